@@ -0,0 +1,30 @@
+import json
+import logging
+import os
+
+CONFIG_FILE = os.path.join(os.getcwd(), "config.json")
+DEFAULT_LOOP_TIME = 30
+
+logger = logging.getLogger(__name__)
+
+
+def default_config():
+    return {"urls": [], "keywords": [], "loop_time": DEFAULT_LOOP_TIME}
+
+
+def load_config(path=CONFIG_FILE):
+    if os.path.exists(path):
+        try:
+            with open(path, 'r') as f:
+                return json.load(f)
+        except json.JSONDecodeError:
+            logger.error("Błąd podczas wczytywania pliku konfiguracyjnego.")
+            return default_config()
+    return default_config()
+
+
+def site_rules(config):
+    """Zwraca listy adresów stron i ich selektorów w formacie oczekiwanym przez SearchWorker."""
+    sites = [site_data["url"] for site_data in config.get("urls", [])]
+    selectors = [site_data.get("selectors", []) for site_data in config.get("urls", [])]
+    return sites, selectors
@@ -0,0 +1,39 @@
+import logging
+import logging.handlers
+import os
+import sys
+from queue import SimpleQueue
+
+LOG_FILE = os.path.join(os.getcwd(), "przeszukiwarka.log")
+DEFAULT_LOG_LEVEL = "INFO"  # Komunikaty dla każdego przetargu i selektora są na poziomie DEBUG
+DEFAULT_LOG_MAX_BYTES = 5 * 1024 * 1024  # Rozmiar pliku logu, po którym zaczynamy nowy
+DEFAULT_LOG_BACKUPS = 3  # Liczba zachowanych starszych plików logu
+LOG_FORMAT = "%(asctime)s %(levelname)s %(name)s: %(message)s"
+DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+def setup_logging(level=DEFAULT_LOG_LEVEL, log_file=LOG_FILE, console=True, max_bytes=DEFAULT_LOG_MAX_BYTES,
+                  backups=DEFAULT_LOG_BACKUPS):
+    """Konfiguruje logowanie przez kolejkę: wątki tylko wstawiają rekordy, a zapis do konsoli i pliku wykonuje
+    osobny wątek QueueListener. Zwraca listener, który trzeba zatrzymać przy zamykaniu programu."""
+    formatter = logging.Formatter(LOG_FORMAT, DATE_FORMAT)
+    handlers = []
+    if console:
+        handlers.append(logging.StreamHandler(sys.stdout))
+    if log_file:
+        handlers.append(logging.handlers.RotatingFileHandler(log_file, maxBytes=max_bytes, backupCount=backups,
+                                                             encoding="utf-8"))
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    queue = SimpleQueue()
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(logging.handlers.QueueHandler(queue))
+    if isinstance(level, str):
+        level = logging.getLevelName(level.upper())
+    root.setLevel(level if isinstance(level, int) else DEFAULT_LOG_LEVEL)
+    listener = logging.handlers.QueueListener(queue, *handlers)
+    listener.start()
+    return listener
@@ -0,0 +1,263 @@
+"""Benchmark pełnych cykli wyszukiwania (pobieranie, parsowanie, dopasowanie, zapis) na lokalnym serwerze testowym.
+
+Każdy scenariusz działa w osobnym procesie i katalogu tymczasowym, więc baza, pliki Excel i szczytowe zużycie
+pamięci (RSS) dotyczą tylko jego. Domyślnie uruchamiane są wszystkie kombinacje: 1/10/100 stron,
+10/1000/100000 zapisanych przetargów i 5/500 słów kluczowych.
+
+Uruchomienie:
+    python benchmarks/crawl_benchmark.py
+    python benchmarks/crawl_benchmark.py --sites 1,10 --stored 1000 --keywords 5 --cycles 3
+    python benchmarks/crawl_benchmark.py --output wyniki.json --compare poprzednie_wyniki.json
+"""
+import argparse
+import itertools
+import json
+import logging
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+try:
+    import resource  # Niedostępny w Windows - wtedy nie podajemy szczytowego RSS
+except ImportError:
+    resource = None
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCHMARKS_DIR))
+sys.path.insert(0, BENCHMARKS_DIR)
+
+from standin_server import StandinServer, PORTALS  # noqa: E402
+
+# Słowa kluczowe występujące w tytułach z fixtures; pozostałe są sztuczne i niczego nie dopasowują
+REAL_KEYWORDS = ["remont", "drog", "kanalizac", "termomodernizac", "oświetleni", "dostawa", "przedszkol",
+                 "komputer", "elewac", "dach"]
+
+
+def parse_list(value):
+    return [int(item) for item in value.split(",") if item.strip()]
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark cykli wyszukiwania na lokalnym serwerze testowym.")
+    parser.add_argument("--sites", type=parse_list, default=[1, 10, 100], help="liczby stron, np. 1,10,100")
+    parser.add_argument("--stored", type=parse_list, default=[10, 1000, 100000],
+                        help="liczby przetargów zapisanych w bazie przed pomiarem")
+    parser.add_argument("--keywords", type=parse_list, default=[5, 500], help="liczby słów kluczowych")
+    parser.add_argument("--cycles", type=int, default=5, help="liczba cykli w scenariuszu (pierwszy jest zimny)")
+    parser.add_argument("--latency", type=float, default=0.02, help="opóźnienie odpowiedzi serwera w sekundach")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="odsetek odpowiedzi 503 (0-1)")
+    parser.add_argument("--pages", type=int, default=1, help="liczba stron listy na każdej stronie")
+    parser.add_argument("--rows", type=int, default=50, help="liczba przetargów na stronie listy")
+    parser.add_argument("--new", type=int, default=5, help="liczba nowych przetargów przy każdym pobraniu")
+    parser.add_argument("--process-workers", type=int, default=0,
+                        help="liczba procesów parsujących strony (process_workers, domyślnie 0 - bez puli)")
+    parser.add_argument("--output", help="zapisz wyniki do pliku JSON")
+    parser.add_argument("--compare", help="porównaj z wynikami zapisanymi wcześniej przez --output")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="pogorszenie (np. 0.2 = 20%%), od którego wynik jest oznaczany jako regresja")
+    parser.add_argument("--run", help=argparse.SUPPRESS)  # Scenariusz w procesie potomnym (JSON)
+    return parser.parse_args(argv)
+
+
+def keyword_list(count):
+    return REAL_KEYWORDS[:count] + [f"słowo{i}" for i in range(max(0, count - len(REAL_KEYWORDS)))]
+
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+def peak_rss_mb():
+    if resource is None:
+        return None
+    # Z pulą procesów liczy się też największy z procesów roboczych
+    peak = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+               resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+    # Linux podaje wartość w kilobajtach, macOS w bajtach
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def seed_store(count):
+    """Wypełnia nową bazę w bieżącym katalogu przetargami z poprzednich cykli."""
+    from tender_store import TenderStore, MATCHED, UNMATCHED
+
+    store = TenderStore()
+    now = time.time()
+    rows = [(f"https://archiwum.example/przetarg/{i}", f"Archiwalny przetarg nr {i}",
+             "remont" if i % 10 == 0 else None, MATCHED if i % 10 == 0 else UNMATCHED, now)
+            for i in range(count)]
+    with store.lock:
+        store.connection.executemany(
+            "INSERT INTO tenders (link, title, keyword, matched, first_seen) VALUES (?, ?, ?, ?, ?)", rows)
+        store.connection.commit()
+    store.close()
+
+
+def run_scenario(scenario):
+    """Wykonuje scenariusz w bieżącym procesie i katalogu; zwraca słownik z wynikami."""
+    logging.basicConfig(level=logging.WARNING)
+    from metrics import MetricsRegistry
+    from search_worker import SearchWorker
+    from tender_pipeline import TenderPipeline, PipelineWriter
+
+    config = {
+        "urls": scenario["urls"],
+        "keywords": keyword_list(scenario["keywords"]),
+        # Wszystkie udawane strony są na jednym hoście, więc limity dla hosta nie mogą być wąskim gardłem
+        "requests_per_second": 10000,
+        "burst": 10000,
+        "max_per_host": 16,
+        "respect_robots": False,
+        "process_workers": scenario["process_workers"],
+    }
+    started = time.perf_counter()
+    seed_store(scenario["stored"])
+    pipeline = TenderPipeline(config)
+    setup = time.perf_counter() - started
+
+    metrics = MetricsRegistry()
+    writer = PipelineWriter(pipeline, metrics=metrics)
+    writer.start()
+    sites = [site["url"] for site in config["urls"]]
+    selectors = [site["selectors"] for site in config["urls"]]
+    worker = SearchWorker(sites, selectors, config["keywords"], writer.handle_new_tender, 60,
+                          writer.handle_all_results, writer.handle_unfiltered_tender, None, config, writer.flush,
+                          pipeline.is_known, metrics)
+    latencies = []
+    fetches = found = new = errors = 0
+    try:
+        for _ in range(scenario["cycles"]):
+            cycle_start = time.perf_counter()
+            worker.perform_search()
+            writer.flush()
+            writer.wait_idle()  # Cykl kończy się dopiero po zapisaniu wszystkich przetargów
+            latencies.append(time.perf_counter() - cycle_start)
+            totals = metrics.last_cycle.totals()
+            fetches += totals.fetches
+            found += totals.found
+            new += totals.new
+            errors += totals.errors
+    finally:
+        worker.close()
+        writer.stop()
+        pipeline.close()
+
+    elapsed = sum(latencies)
+    # Pierwszy cykl zapisuje wszystkie przetargi z list, więc percentyle liczymy z kolejnych
+    steady = latencies[1:] or latencies
+    return {
+        "sites": len(sites),
+        "stored": scenario["stored"],
+        "keywords": scenario["keywords"],
+        "cycles": len(latencies),
+        "setup_seconds": setup,
+        "first_cycle_seconds": latencies[0] if latencies else 0.0,
+        "p50_seconds": percentile(steady, 0.5),
+        "p95_seconds": percentile(steady, 0.95),
+        "max_seconds": max(steady) if steady else 0.0,
+        "pages_per_second": fetches / elapsed if elapsed else 0.0,
+        "tenders_per_second": found / elapsed if elapsed else 0.0,
+        "fetches": fetches,
+        "found": found,
+        "new": new,
+        "errors": errors,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def run_in_subprocess(scenario):
+    with tempfile.TemporaryDirectory(prefix="przetargi_bench_") as work_dir:
+        completed = subprocess.run([sys.executable, os.path.abspath(__file__), "--run", json.dumps(scenario)],
+                                   cwd=work_dir, capture_output=True, text=True, encoding="utf-8")
+    if completed.returncode != 0:
+        raise RuntimeError(f"Scenariusz zakończył się błędem:\n{completed.stderr}")
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def scenario_key(result):
+    return result["sites"], result["stored"], result["keywords"]
+
+
+def print_header():
+    print(f"{'strony':>7}{'zapisane':>10}{'słowa':>7}{'przetargi/s':>13}{'strony/s':>10}{'1. cykl ms':>12}"
+          f"{'p50 ms':>9}{'p95 ms':>9}{'max ms':>9}{'błędy':>7}{'RSS MB':>9}")
+
+
+def print_result(result):
+    rss = f"{result['peak_rss_mb']:.1f}" if result["peak_rss_mb"] is not None else "-"
+    print(f"{result['sites']:>7}{result['stored']:>10}{result['keywords']:>7}{result['tenders_per_second']:>13.1f}"
+          f"{result['pages_per_second']:>10.1f}{result['first_cycle_seconds'] * 1000:>12.1f}"
+          f"{result['p50_seconds'] * 1000:>9.1f}{result['p95_seconds'] * 1000:>9.1f}"
+          f"{result['max_seconds'] * 1000:>9.1f}{result['errors']:>7}{rss:>9}")
+
+
+def compare(results, baseline_path, threshold):
+    """Wypisuje zmiany względem wcześniejszych wyników; zwraca liczbę regresji."""
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = {scenario_key(result): result for result in json.load(f)["results"]}
+    regressions = 0
+    print(f"\nPorównanie z {baseline_path} (regresja: pogorszenie o więcej niż {threshold:.0%}):")
+    for result in results:
+        previous = baseline.get(scenario_key(result))
+        if previous is None:
+            continue
+        # Dla czasu i pamięci wzrost jest pogorszeniem, dla przepustowości spadek
+        checks = [("p50", result["p50_seconds"], previous["p50_seconds"], 1),
+                  ("p95", result["p95_seconds"], previous["p95_seconds"], 1),
+                  ("przetargi/s", result["tenders_per_second"], previous["tenders_per_second"], -1)]
+        if result["peak_rss_mb"] and previous.get("peak_rss_mb"):
+            checks.append(("RSS", result["peak_rss_mb"], previous["peak_rss_mb"], 1))
+        changes = []
+        for name, current, before, direction in checks:
+            if not before:
+                continue
+            change = (current - before) / before
+            regression = change * direction > threshold
+            regressions += regression
+            changes.append(f"{name} {change:+.0%}{' REGRESJA' if regression else ''}")
+        print(f"  strony={result['sites']}, zapisane={result['stored']}, słowa={result['keywords']}: "
+              + ", ".join(changes))
+    return regressions
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.run:
+        print(json.dumps(run_scenario(json.loads(args.run))))
+        return 0
+
+    server = StandinServer(latency=args.latency, error_rate=args.error_rate, pages=args.pages,
+                           rows_per_page=args.rows, new_per_fetch=args.new).start()
+    portals = list(PORTALS)
+    results = []
+    try:
+        print_header()
+        for sites, stored, keywords in itertools.product(args.sites, args.stored, args.keywords):
+            # Osobne numery stron w każdym scenariuszu, żeby liczniki pobrań serwera zaczynały od zera
+            offset = len(results) * 1000
+            urls = [server.site_config(portals[i % len(portals)], offset + i + 1) for i in range(sites)]
+            result = run_in_subprocess({"urls": urls, "stored": stored, "keywords": keywords,
+                                        "cycles": args.cycles, "process_workers": args.process_workers})
+            results.append(result)
+            print_result(result)
+    finally:
+        server.stop()
+
+    if args.output:
+        settings = {"cycles": args.cycles, "latency": args.latency, "error_rate": args.error_rate,
+                    "pages": args.pages, "rows": args.rows, "new": args.new,
+                    "process_workers": args.process_workers}
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"settings": settings, "results": results}, f, ensure_ascii=False, indent=2)
+    if args.compare:
+        return 1 if compare(results, args.compare, args.threshold) else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,66 @@
+"""Mikro-benchmark silników parsowania: czas parsowania i wykonania selektorów na zapisanych stronach.
+
+Uruchomienie: python benchmarks/parser_benchmark.py [liczba_powtórzeń]
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from html_parsing import PARSER_BACKENDS, backend_available, parse_document  # noqa: E402
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+# Strona testowa -> selektory używane w config.json dla tego portalu
+FIXTURES = {
+    "egospodarka_lista.html": [
+        "#przetargi-list > tbody > tr:nth-child(2) > td:nth-child(5)",
+        "#przetargi-list > tbody > tr:nth-child(3) > td:nth-child(5) > a",
+        "#przetargi-list td.title > a",
+    ],
+    "portalzp_lista.html": [
+        "#tendersSearchList > ul > li:nth-child(1)",
+        ".tender-item .tTitle",
+        ".tender-item .tTitle > a",
+    ],
+}
+
+
+def benchmark(content, selectors, backend, repeats):
+    parse_time = 0.0
+    select_time = 0.0
+    found = 0
+    for _ in range(repeats):
+        start = time.perf_counter()
+        document = parse_document(content, backend)
+        document.css_root()
+        parsed = time.perf_counter()
+        found = 0
+        for selector in selectors:
+            for element in document.select(selector):
+                element.get_text(strip=True)
+                element.get("href")
+                found += 1
+        select_time += time.perf_counter() - parsed
+        parse_time += parsed - start
+    return parse_time / repeats, select_time / repeats, found
+
+
+def main():
+    repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    print(f"{'strona':<26}{'silnik':<14}{'parsowanie ms':>15}{'selektory ms':>15}{'razem ms':>12}{'elementy':>10}")
+    for name, selectors in FIXTURES.items():
+        with open(os.path.join(FIXTURES_DIR, name), "rb") as f:
+            content = f.read()
+        for backend in PARSER_BACKENDS:
+            if not backend_available(backend):
+                print(f"{name:<26}{backend:<14}{'niedostępny':>15}")
+                continue
+            parse_time, select_time, found = benchmark(content, selectors, backend, repeats)
+            print(f"{name:<26}{backend:<14}{parse_time * 1000:>15.2f}{select_time * 1000:>15.2f}"
+                  f"{(parse_time + select_time) * 1000:>12.2f}{found:>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+"""Lokalny serwer udający portale przetargowe, do benchmarków bez łączenia się z prawdziwymi stronami.
+
+Strony list są budowane z zapisanych stron z katalogu fixtures. Każde pobranie strony pokazuje na górze
+`new_per_fetch` nowych przetargów, a starsze przesuwają się w dół, tak jak na prawdziwych portalach.
+
+Adresy: http://127.0.0.1:PORT/<portal>/<numer strony w konfiguracji>/lista?page=N
+Uruchomienie samodzielne: python benchmarks/standin_server.py [port]
+"""
+import os
+import random
+import re
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+# Portal -> (plik strony, wzorzec wiersza z przetargiem, wzorzec stronicowania)
+PORTALS = {
+    "egospodarka": ("egospodarka_lista.html", r'<tr class="(?:odd|even)">.*?</tr>\s*',
+                    r'<div class="pagination">.*?</div>'),
+    "portalzp": ("portalzp_lista.html", r'<li class="tender-item">.*?</li>\s*', r'<nav class="pager">.*?</nav>'),
+}
+LINK_PATTERN = re.compile(r'href="/przetarg[^"]*"')
+
+# Ustawienia selektorów i pól dla config.json, zgodne z układem stron z fixtures
+SITE_RULES = {
+    "egospodarka": {
+        "selectors": ["#przetargi-list tr"],
+        "next_page_selector": "a.next",
+        "fields": {"title": "td.title a", "deadline": "td.deadline", "buyer": "td.buyer", "value": "td.value",
+                   "region": "td.region"},
+    },
+    "portalzp": {
+        "selectors": [".tender-item"],
+        "next_page_selector": "a.next",
+        "fields": {"title": ".tTitle a", "deadline": ".tDeadline strong", "buyer": ".tBuyer", "value": ".tValue",
+                   "region": ".tRegion"},
+    },
+}
+
+
+class PortalTemplate:
+    """Strona listy z fixtures podzielona na nagłówek, wiersze przetargów i stopkę."""
+
+    def __init__(self, portal):
+        file_name, row_pattern, pager_pattern = PORTALS[portal]
+        with open(os.path.join(FIXTURES_DIR, file_name), encoding="utf-8") as f:
+            html = f.read()
+        matches = list(re.finditer(row_pattern, html, re.S))
+        self.head = html[:matches[0].start()]
+        self.rows = [match.group(0) for match in matches]
+        self.tail = re.sub(pager_pattern, "{pager}", html[matches[-1].end():], count=1, flags=re.S)
+        if "{pager}" not in self.tail:
+            self.tail = self.tail.replace("</body>", "{pager}</body>")
+
+    def render(self, prefix, first_id, count, page, pages):
+        rows = []
+        for offset in range(count):
+            tender_id = first_id - offset
+            if tender_id <= 0:
+                break
+            row = self.rows[tender_id % len(self.rows)]
+            rows.append(LINK_PATTERN.sub(f'href="{prefix}/przetarg/{tender_id}"', row, count=1))
+        pager = f'<a class="next" href="{prefix}/lista?page={page + 1}">dalej</a>' if page < pages else ""
+        # Nawiasy klamrowe mogą wystąpić w treści strony, więc nie używamy str.format
+        return self.head + "".join(rows) + self.tail.replace("{pager}", pager)
+
+
+class StandinServer:
+    """Serwer HTTP z konfigurowalnym opóźnieniem, odsetkiem błędów 503 i liczbą stron listy."""
+
+    def __init__(self, port=0, latency=0.0, error_rate=0.0, pages=1, rows_per_page=50, new_per_fetch=5, seed=0):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.pages = pages
+        self.rows_per_page = rows_per_page
+        self.new_per_fetch = new_per_fetch
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.fetches = {}  # (portal, strona) -> liczba pobrań pierwszej strony listy
+        self.requests = 0
+        self.errors = 0
+        self.templates = {portal: PortalTemplate(portal) for portal in PORTALS}
+        self.server = ThreadingHTTPServer(("127.0.0.1", port), self.handler_class())
+        self.server.daemon_threads = True
+        self.port = self.server.server_address[1]
+        self.thread = None
+
+    def site_url(self, portal, number):
+        return f"http://127.0.0.1:{self.port}/{portal}/{number}/lista"
+
+    def site_config(self, portal, number):
+        """Wpis do listy urls w config.json dla jednej udawanej strony."""
+        site = {"url": self.site_url(portal, number), "max_pages": self.pages, "max_items": self.rows_per_page}
+        site.update(SITE_RULES[portal])
+        return site
+
+    def page(self, portal, number, page):
+        with self.lock:
+            self.requests += 1
+            if self.error_rate and self.random.random() < self.error_rate:
+                self.errors += 1
+                return None
+            key = (portal, number)
+            if page == 1:
+                self.fetches[key] = self.fetches.get(key, 0) + 1
+            fetches = self.fetches.get(key, 1)
+        # Najnowszy przetarg ma największy numer; każde pobranie dodaje new_per_fetch nowych
+        newest = self.rows_per_page * self.pages + fetches * self.new_per_fetch
+        first_id = newest - (page - 1) * self.rows_per_page
+        prefix = f"/{portal}/{number}"
+        return self.templates[portal].render(prefix, first_id, self.rows_per_page, page, self.pages)
+
+    def handler_class(self):
+        standin = self
+
+        class StandinHandler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                if standin.latency:
+                    time.sleep(standin.latency)
+                parts = urlsplit(self.path)
+                segments = parts.path.strip("/").split("/")
+                if len(segments) != 3 or segments[0] not in PORTALS or segments[2] != "lista":
+                    self.send_text(404, "Nie znaleziono")
+                    return
+                try:
+                    page = int(parse_qs(parts.query).get("page", ["1"])[0])
+                except ValueError:
+                    page = 1
+                html = standin.page(segments[0], segments[1], page)
+                if html is None:
+                    self.send_text(503, "Usługa chwilowo niedostępna")
+                    return
+                self.send_text(200, html, "text/html")
+
+            def send_text(self, status, text, content_type="text/plain"):
+                body = text.encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", f"{content_type}; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return StandinHandler
+
+    def start(self):
+        self.thread = threading.Thread(target=self.server.serve_forever, name="standin", daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+if __name__ == "__main__":
+    server = StandinServer(int(sys.argv[1]) if len(sys.argv) > 1 else 8800).start()
+    print(f"Serwer testowy: {server.site_url('egospodarka', 1)}, {server.site_url('portalzp', 1)}")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        server.stop()
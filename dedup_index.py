@@ -0,0 +1,83 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+DEDUP_FILE = os.path.join(os.getcwd(), "przetargi_dedup.db")  # Indeks już widzianych przetargów
+DEFAULT_RETENTION_DAYS = 90  # Po tylu dniach bez ponownego wystąpienia wpis jest usuwany
+
+# Przestrzenie kluczy w indeksie (bity flag we wpisie przetargu)
+ALL = 1
+FILTERED = 2
+UNFILTERED = 4
+
+
+def normalize_link(link):
+    """Sprowadza link do postaci kanonicznej (małe litery hosta, bez fragmentu i parametrów śledzących)."""
+    parts = urlsplit(link.strip())
+    query = sorted((key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+                   if not key.lower().startswith("utm_"))
+    path = parts.path.rstrip("/") or "/"
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), path, urlencode(query), ""))
+
+
+def dedup_key(link):
+    # Liczba ze znakiem, żeby zmieściła się w kolumnie INTEGER SQLite
+    digest = hashlib.blake2b(normalize_link(link).encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "little", signed=True)
+
+
+class DedupIndex:
+    """Trwały indeks deduplikacji: tabela SQLite z kluczem głównym, więc start nie wczytuje wpisów do pamięci.
+
+    Jeden wiersz na przetarg: czas ostatniego wystąpienia i flagi przestrzeni, w których był zapisany.
+    """
+
+    def __init__(self, path=DEDUP_FILE, retention_days=DEFAULT_RETENTION_DAYS):
+        self.path = path
+        self.retention = float(retention_days) * 24 * 3600
+        self.lock = threading.Lock()  # Połączenie jest współdzielone przez wątek wyszukiwania i wątek zapisu
+        self.is_new = not os.path.exists(path)
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS seen (key INTEGER PRIMARY KEY, seen INTEGER NOT NULL, flags INTEGER NOT NULL)")
+        self.connection.execute("CREATE INDEX IF NOT EXISTS idx_seen_seen ON seen(seen)")
+        # Usuwamy wpisy przetargów, których nie było na stronach dłużej niż okres przechowywania
+        self.connection.execute("DELETE FROM seen WHERE seen < ?", (int(time.time() - self.retention),))
+        self.connection.commit()
+
+    def contains_key(self, key, namespace=ALL):
+        with self.lock:
+            row = self.connection.execute("SELECT flags FROM seen WHERE key = ?", (key,)).fetchone()
+        return row is not None and bool(row[0] & namespace)
+
+    def add_key(self, key, namespace=ALL):
+        """Dodaje klucz policzony funkcją dedup_key (np. Tender.key); zwraca True, jeśli wcześniej go nie było."""
+        now = int(time.time())
+        with self.lock:
+            row = self.connection.execute("SELECT seen, flags FROM seen WHERE key = ?", (key,)).fetchone()
+            seen, flags = row if row is not None else (0, 0)
+            if flags & namespace and now - seen < self.retention / 2:
+                return False
+            # Nowy wpis lub odświeżenie starego, żeby nie wygasł, dopóki przetarg jest widoczny na stronie
+            self.connection.execute("INSERT OR REPLACE INTO seen (key, seen, flags) VALUES (?, ?, ?)",
+                                    (key, now, flags | namespace))
+            self.connection.commit()
+            return not flags & namespace
+
+    def add_many(self, links, namespace=ALL):
+        now = int(time.time())
+        with self.lock:
+            self.connection.executemany(
+                "INSERT INTO seen (key, seen, flags) VALUES (?, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET flags = flags | excluded.flags",
+                ((dedup_key(link), now, namespace) for link in links))
+            self.connection.commit()
+
+    def close(self):
+        with self.lock:
+            self.connection.close()
@@ -0,0 +1,214 @@
+import logging
+import os
+import tempfile
+import threading
+import time
+
+from tender_store import EXPORT_COLUMNS
+
+DEFAULT_FLUSH_ROWS = 200  # Zapis po zebraniu tylu nowych wierszy
+DEFAULT_FLUSH_SECONDS = 30  # Zapis najpóźniej po tylu sekundach od pierwszego oczekującego wiersza
+
+COLUMNS = EXPORT_COLUMNS
+
+logger = logging.getLogger(__name__)
+
+# umask można tylko odczytać przez ustawienie nowej wartości, dlatego robimy to raz, przed startem wątków
+UMASK = os.umask(0)
+os.umask(UMASK)
+
+
+def file_mode(file_path):
+    # mkstemp tworzy plik z prawami 0600 - plik docelowy zachowuje dotychczasowe prawa, a nowy dostaje
+    # takie jak po zwykłym otwarciu do zapisu (0666 z uwzględnieniem umask)
+    try:
+        return os.stat(file_path).st_mode & 0o7777
+    except FileNotFoundError:
+        return 0o666 & ~UMASK
+
+
+def atomic_to_excel(df, file_path):
+    """Zapisuje DataFrame do pliku tymczasowego i podmienia plik docelowy jedną operacją."""
+    directory = os.path.dirname(os.path.abspath(file_path))
+    fd, temp_path = tempfile.mkstemp(suffix=".xlsx", prefix=".tmp_", dir=directory)
+    os.close(fd)
+    try:
+        df.to_excel(temp_path, index=False)
+        os.chmod(temp_path, file_mode(file_path))
+        os.replace(temp_path, file_path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+class ExcelExportWriter(threading.Thread):
+    """Wątek zbierający nowe wiersze w pamięci i zapisujący je do plików Excel partiami."""
+
+    def __init__(self, flush_rows=DEFAULT_FLUSH_ROWS, flush_seconds=DEFAULT_FLUSH_SECONDS):
+        super().__init__(daemon=True)
+        self.flush_rows = max(1, int(flush_rows))
+        self.flush_seconds = float(flush_seconds)
+        self.pending = {}  # Ścieżka pliku -> lista oczekujących przetargów (Tender)
+        self.pending_since = None  # Czas dodania pierwszego oczekującego wiersza
+        self.exports = {}  # Ścieżka pliku -> funkcja zwracająca pełną zawartość pliku (DataFrame)
+        self.frames = {}  # Ścieżka pliku -> zawartość pliku wczytana przy pierwszym zapisie
+        self.condition = threading.Condition()
+        self.write_lock = threading.Lock()  # Serializuje zapisy plików
+        self.flush_requested = False
+        self.retry_at = 0.0  # Po nieudanym zapisie (np. plik otwarty w Excelu) ponawiamy go nie wcześniej niż wtedy
+        self.stop_event = threading.Event()
+
+    def add(self, file_path, tender):
+        with self.condition:
+            self.pending.setdefault(file_path, []).append(tender)
+            if self.pending_since is None:
+                self.pending_since = time.monotonic()
+            if sum(len(rows) for rows in self.pending.values()) >= self.flush_rows:
+                self.condition.notify()
+
+    def request_flush(self):
+        # Wywoływane np. na koniec cyklu wyszukiwania
+        with self.condition:
+            self.flush_requested = True
+            self.condition.notify()
+
+    def request_export(self, file_path, build_frame):
+        """Zleca podmianę całego pliku (np. pełny eksport z bazy) w tym wątku; build_frame() zwraca DataFrame.
+
+        Kolejne zlecenia dla tego samego pliku przed rozpoczęciem eksportu są wykonywane raz.
+        """
+        with self.condition:
+            self.exports[file_path] = build_frame
+            self.condition.notify()
+
+    def run(self):
+        while not self.stop_event.is_set():
+            with self.condition:
+                self.condition.wait_for(self.should_flush, timeout=self.timeout())
+                exports = self.take_exports() if self.exports_due() else {}
+            # Pełne eksporty najpierw - usuwają z oczekujących wiersze, które już zawierają
+            self.write_exports(exports)
+            with self.condition:
+                batch = self.take_pending() if self.rows_due() else {}
+            self.write_batch(batch)
+        with self.condition:
+            exports = self.take_exports()
+        self.write_exports(exports)
+        with self.condition:
+            batch = self.take_pending()
+        self.write_batch(batch)
+        with self.condition:
+            unsaved = sum(len(rows) for rows in self.pending.values())
+        if unsaved or self.exports:
+            logger.error("Przy zamykaniu nie zapisano %d przetargów i %d eksportów do plików Excel "
+                         "(przetargi pozostają w bazie).", unsaved, len(self.exports))
+
+    def timeout(self):
+        now = time.monotonic()
+        if self.retry_at > now:
+            return self.retry_at - now
+        if self.pending_since is None:
+            return self.flush_seconds
+        return max(0.0, self.pending_since + self.flush_seconds - now)
+
+    def should_flush(self):
+        return self.stop_event.is_set() or self.exports_due() or self.rows_due()
+
+    def retry_pending(self):
+        return not self.stop_event.is_set() and time.monotonic() < self.retry_at
+
+    def exports_due(self):
+        return bool(self.exports) and not self.retry_pending()
+
+    def rows_due(self):
+        if not self.pending or self.retry_pending():
+            return False
+        if self.flush_requested:
+            return True
+        if sum(len(rows) for rows in self.pending.values()) >= self.flush_rows:
+            return True
+        return time.monotonic() - self.pending_since >= self.flush_seconds
+
+    def take_pending(self):
+        batch = self.pending
+        self.pending = {}
+        self.pending_since = None
+        self.flush_requested = False
+        return batch
+
+    def take_exports(self):
+        exports = self.exports
+        self.exports = {}
+        return exports
+
+    def restore_rows(self, file_path, rows):
+        # Wiersze z nieudanego zapisu wracają na początek kolejki pliku i zostaną zapisane w kolejnej próbie
+        with self.condition:
+            self.pending[file_path] = rows + self.pending.get(file_path, [])
+            self.pending_since = time.monotonic()
+            self.retry_at = self.pending_since + self.flush_seconds
+
+    def restore_export(self, file_path, build_frame):
+        # Nowsze zlecenie eksportu tego pliku ma pierwszeństwo przed ponowieniem nieudanego
+        with self.condition:
+            self.exports.setdefault(file_path, build_frame)
+            self.retry_at = time.monotonic() + self.flush_seconds
+
+    def load_frame(self, file_path):
+        import pandas as pd
+
+        if file_path not in self.frames:
+            if os.path.exists(file_path):
+                self.frames[file_path] = pd.read_excel(file_path)
+            else:
+                self.frames[file_path] = pd.DataFrame(columns=COLUMNS)
+        return self.frames[file_path]
+
+    def write_batch(self, batch):
+        import pandas as pd
+
+        for file_path, rows in batch.items():
+            with self.write_lock:
+                try:
+                    df_existing = self.load_frame(file_path)
+                    df_new = pd.DataFrame([tender.row() for tender in rows], columns=COLUMNS)
+                    df_combined = pd.concat([df_existing, df_new], ignore_index=True)
+                    atomic_to_excel(df_combined, file_path)
+                    self.frames[file_path] = df_combined
+                    logger.info("Zapisano %d nowych przetargów do pliku: %s", len(rows), file_path)
+                except Exception as e:
+                    # Plik na dysku i self.frames pozostają bez zmian, a wiersze czekają na ponowienie zapisu
+                    self.restore_rows(file_path, rows)
+                    logger.error("Błąd podczas zapisu do pliku: %s (ponowienie za %.0f s)\nSzczegóły: %s",
+                                 file_path, self.flush_seconds, e)
+
+    def write_exports(self, exports):
+        for file_path, build_frame in exports.items():
+            with self.write_lock:
+                try:
+                    # Oczekujące wiersze są już w bazie, więc eksport je zastępuje (także te, które w międzyczasie
+                    # zmieniły klasyfikację); wiersze dodane w trakcie odczytu dopisujemy, jeśli ich w nim nie ma
+                    with self.condition:
+                        self.pending.pop(file_path, None)
+                    df = build_frame()
+                    links = set(df["Link"])
+                    with self.condition:
+                        rows = [tender for tender in self.pending.pop(file_path, []) if tender.link not in links]
+                        if rows:
+                            self.pending[file_path] = rows
+                        elif not self.pending:
+                            self.pending_since = None
+                    atomic_to_excel(df, file_path)
+                    self.frames[file_path] = df
+                    logger.info("Wyeksportowano %d przetargów do pliku: %s", len(df), file_path)
+                except Exception as e:
+                    # Wiersze usunięte z oczekujących są w bazie, więc ponowiony eksport je zawiera
+                    self.restore_export(file_path, build_frame)
+                    logger.error("Błąd podczas eksportu do pliku: %s (ponowienie za %.0f s)\nSzczegóły: %s",
+                                 file_path, self.flush_seconds, e)
+
+    def stop(self):
+        self.stop_event.set()
+        with self.condition:
+            self.condition.notify()
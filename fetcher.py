@@ -0,0 +1,353 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import CancelledError, Future, ThreadPoolExecutor, wait, FIRST_COMPLETED
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+DEFAULT_MAX_CONCURRENCY = 8  # Maksymalna liczba jednoczesnych pobrań
+DEFAULT_MAX_PER_HOST = 2  # Maksymalna liczba jednoczesnych pobrań z jednego hosta
+DEFAULT_TIMEOUT = 10
+DEFAULT_RETRIES = 3  # Liczba ponowień po błędach 500/502/504 i przekroczeniu czasu
+DEFAULT_BACKOFF_FACTOR = 0.5  # Opóźnienia ponowień: 0.5 s, 1 s, 2 s... plus losowy rozrzut
+DEFAULT_BACKOFF_JITTER = 0.5
+DEFAULT_POOL_CONNECTIONS = 20  # Liczba hostów, dla których trzymamy otwarte połączenia
+HTTP_CACHE_FILE = os.path.join(os.getcwd(), "http_cache.json")  # Nagłówki ETag/Last-Modified i skróty stron
+STOP_CHECK_INTERVAL = 0.5  # Co ile sekund oczekujący na pobrania sprawdza, czy nie zatrzymano wyszukiwania
+
+
+def accept_encoding():
+    encodings = ["gzip", "deflate"]
+    try:
+        import brotli  # noqa: F401
+        encodings.append("br")
+    except ImportError:
+        try:
+            import brotlicffi  # noqa: F401
+            encodings.append("br")
+        except ImportError:
+            pass
+    return ", ".join(encodings)
+
+
+def content_digest(content):
+    # Skrót treści do wykrywania stron, które nie zmieniły się od poprzedniego cyklu
+    return hashlib.blake2b(content, digest_size=16).hexdigest()
+
+
+def create_session(pool_connections=DEFAULT_POOL_CONNECTIONS, pool_maxsize=DEFAULT_MAX_PER_HOST,
+                   retries=DEFAULT_RETRIES, backoff_factor=DEFAULT_BACKOFF_FACTOR,
+                   backoff_jitter=DEFAULT_BACKOFF_JITTER):
+    """Wspólna sesja HTTP: utrzymywane połączenia (keep-alive), kompresja i ponowienia z wykładniczym opóźnieniem.
+
+    Odpowiedzi 429/503 i nagłówek Retry-After obsługuje RateLimiter (wstrzymanie hosta z górną granicą i reakcją
+    na zatrzymanie) - urllib3 nie może na nie czekać wewnątrz session.get.
+    """
+    retry_options = dict(total=retries, connect=retries, read=retries, status=retries,
+                         status_forcelist=(500, 502, 504), allowed_methods=frozenset({"GET", "HEAD"}),
+                         backoff_factor=backoff_factor, raise_on_status=False, respect_retry_after_header=False)
+    try:
+        retry = Retry(backoff_jitter=backoff_jitter, **retry_options)
+    except TypeError:
+        # Starsze wersje urllib3 nie obsługują rozrzutu opóźnień
+        retry = Retry(**retry_options)
+    adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize, max_retries=retry)
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers["Accept-Encoding"] = accept_encoding()
+    return session
+
+
+class ValidatorCache:
+    """Zapamiętuje ETag, Last-Modified i skrót treści każdej strony między cyklami i uruchomieniami."""
+
+    def __init__(self, path=HTTP_CACHE_FILE):
+        self.path = path
+        self.lock = threading.Lock()
+        self.entries = {}
+        self.dirty = False
+        if path and os.path.exists(path):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    self.entries = json.load(f)
+            except (OSError, ValueError):
+                self.entries = {}
+
+    def request_headers(self, url, fingerprint=""):
+        entry = self.entries.get(url, {})
+        headers = {}
+        if entry.get("fingerprint", "") != fingerprint:
+            # Zmieniły się reguły przetwarzania strony - pobieramy ją w całości
+            return headers
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def check(self, url, response, fingerprint="", content_hash=None):
+        """Sprawdza odpowiedź (304 lub identyczna treść); zwraca (bez zmian, nowe walidatory lub None).
+
+        Nowe walidatory zapamiętujemy dopiero przez commit po przetworzeniu strony - strona pobrana, ale
+        nieprzetworzona (np. po zatrzymaniu wyszukiwania) nie może zostać w następnym cyklu uznana za niezmienioną.
+        Dla stron czytanych strumieniowo podajemy skrót przeczytanej części treści.
+        """
+        if response.status_code == 304:
+            return self.entries.get(url, {}).get("fingerprint", "") == fingerprint, None
+        if response.status_code != 200:
+            return False, None
+        if content_hash is None:
+            content_hash = content_digest(response.content)
+        entry = {
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+            "hash": content_hash,
+            "fingerprint": fingerprint,
+        }
+        with self.lock:
+            previous = self.entries.get(url, {})
+        return previous.get("hash") == content_hash and previous.get("fingerprint", "") == fingerprint, entry
+
+    def commit(self, url, entry):
+        # Zapamiętuje walidatory strony, której przetargi zostały już przekazane do zapisu
+        with self.lock:
+            self.entries[url] = entry
+            self.dirty = True
+
+    def save(self):
+        if not self.path or not self.dirty:
+            return
+        with self.lock:
+            temp_path = self.path + ".tmp"
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump(self.entries, f)
+            os.replace(temp_path, self.path)
+            self.dirty = False
+
+
+class FetchResult:
+    __slots__ = ("url", "site", "page", "response", "error", "unchanged", "wait", "duration", "size", "processed",
+                 "validator")
+
+    def __init__(self, url, site=None, page=1, response=None, error=None, unchanged=False, wait=0.0, duration=0.0,
+                 size=0, processed=None, validator=None):
+        self.url = url
+        self.site = site or url  # Adres strony z konfiguracji, do której należy pobrany adres
+        self.page = page  # Numer strony wyników
+        self.response = response
+        self.error = error
+        self.unchanged = unchanged  # Strona nie zmieniła się od poprzedniego cyklu
+        self.wait = wait  # Czas oczekiwania na limit zapytań do hosta
+        self.duration = duration  # Czas zapytania razem z pobraniem treści
+        self.size = size  # Liczba pobranych bajtów treści
+        self.processed = processed  # Wynik przetwarzania strumieniowego (strona nie ma wtedy response.content)
+        self.validator = validator  # Walidatory do zapamiętania w ValidatorCache po przetworzeniu strony
+
+
+class FetchBatch:
+    """Pobrania jednego cyklu; w trakcie można dokładać kolejne adresy (np. następne strony wyników)."""
+
+    def __init__(self, fetcher, stop_event=None):
+        self.fetcher = fetcher
+        self.stop_event = stop_event
+        self.futures = {}
+
+    def add(self, url, site=None, page=1):
+        future = self.fetcher.submit(url, site, page)
+        self.futures[future] = (url, site, page)
+
+    def __iter__(self):
+        """Zwraca FetchResult w kolejności ukończenia, także dla adresów dodanych w trakcie iteracji."""
+        try:
+            while self.futures:
+                # Czekamy krótkimi odcinkami, aby zatrzymanie nie czekało na host wstrzymany przez Retry-After
+                done, _ = wait(self.futures, timeout=STOP_CHECK_INTERVAL, return_when=FIRST_COMPLETED)
+                for future in done:
+                    if self.stopped():
+                        return
+                    url, site, page = self.futures.pop(future)
+                    try:
+                        yield future.result()
+                    except Exception as e:
+                        yield FetchResult(url, site, page, error=e)
+                if self.stopped():
+                    return
+        finally:
+            self.fetcher.cancel(self.futures)
+
+    def stopped(self):
+        return self.stop_event is not None and self.stop_event.is_set()
+
+
+class FetchTask:
+    __slots__ = ("host", "future", "url", "site", "page")
+
+    def __init__(self, host, future, url, site, page):
+        self.host = host
+        self.future = future  # Future z FetchResult, zwracany przez ConcurrentFetcher.submit
+        self.url = url
+        self.site = site
+        self.page = page
+
+
+class ConcurrentFetcher:
+    """Równoległe pobieranie stron z globalnym limitem oraz limitem na host.
+
+    Zlecenie trafia do puli wątków dopiero wtedy, gdy jego host ma wolne miejsce, a oczekiwanie na limit tempa
+    zapytań odbywa się w timerze - zlecenia czekające na zajęty host nie zajmują wątków potrzebnych pozostałym.
+    """
+
+    def __init__(self, max_concurrency=DEFAULT_MAX_CONCURRENCY, max_per_host=DEFAULT_MAX_PER_HOST,
+                 timeout=DEFAULT_TIMEOUT, validators=None, session=None, limiter=None):
+        self.max_concurrency = max(1, int(max_concurrency))
+        self.max_per_host = max(1, int(max_per_host))
+        self.timeout = timeout
+        self.session = session if session is not None else requests.Session()
+        self.validators = validators  # ValidatorCache lub None, gdy żądania warunkowe są wyłączone
+        self.limiter = limiter  # RateLimiter (tempo zapytań, robots.txt, Retry-After) lub None
+        self.fingerprints = {}  # Adres -> opis reguł przetwarzania strony (np. lista selektorów)
+        # Adres strony -> funkcja (response, url, site) -> (wynik, bajty, skrót treści, czas przetwarzania),
+        # przetwarzająca odpowiedź w trakcie pobierania; treść takich stron nie jest trzymana w pamięci w całości
+        self.stream_handlers = {}
+        self.executor = ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix="fetcher")
+        self.lock = threading.Lock()
+        self.active = {}  # Host -> liczba zleceń w toku (także czekających na limit tempa)
+        self.waiting = {}  # Host -> kolejka zleceń czekających na wolne miejsce dla hosta
+        self.timers = set()  # Oczekiwania na limit tempa zapytań
+        self.max_wait = None  # Hosty wstrzymane dłużej przez Retry-After pomijamy (HostThrottled)
+
+    def submit(self, url, site=None, page=1):
+        """Zleca pobranie adresu; zwraca Future z FetchResult."""
+        task = FetchTask(urlparse(url).netloc.lower(), Future(), url, site, page)
+        with self.lock:
+            active = self.active.get(task.host, 0)
+            if active >= self.max_per_host:
+                self.waiting.setdefault(task.host, deque()).append(task)
+                return task.future
+            self.active[task.host] = active + 1
+        if task.future.set_running_or_notify_cancel():
+            self.run_in_pool(self.prepare, task)
+        return task.future
+
+    def run_in_pool(self, function, task, *args):
+        try:
+            self.executor.submit(self.run_task, function, task, *args)
+        except RuntimeError as e:
+            # Pula została już zamknięta
+            self.finish(task, error=e)
+
+    def run_task(self, function, task, *args):
+        # Funkcja zwraca FetchResult albo None, gdy zapytanie czeka jeszcze na limit tempa
+        try:
+            result = function(task, *args)
+        except BaseException as e:
+            self.finish(task, error=e)
+            return
+        if result is not None:
+            self.finish(task, result)
+
+    def finish(self, task, result=None, error=None):
+        if error is not None:
+            task.future.set_exception(error)
+        else:
+            task.future.set_result(result)
+        # Zwolnione miejsce hosta dostaje pierwsze nieanulowane zlecenie z jego kolejki
+        while True:
+            with self.lock:
+                waiting = self.waiting.get(task.host)
+                if not waiting:
+                    self.active[task.host] -= 1
+                    return
+                task = waiting.popleft()
+            if task.future.set_running_or_notify_cancel():
+                self.run_in_pool(self.prepare, task)
+                return
+
+    def prepare(self, task):
+        # robots.txt i limit tempa hosta; na zapytanie czekamy w timerze, a nie w wątku z puli
+        wait = 0.0
+        if self.limiter is not None:
+            self.limiter.check_allowed(task.url)
+            wait = self.limiter.reserve(task.url, self.max_wait)
+        if wait <= 0:
+            return self.fetch(task, 0.0)
+        timer = threading.Timer(wait, self.fetch_later, (task, wait))
+        timer.daemon = True
+        with self.lock:
+            self.timers.add(timer)
+        timer.start()
+        return None
+
+    def fetch_later(self, task, wait):
+        with self.lock:
+            if threading.current_thread() not in self.timers:
+                # Oczekiwanie anulowano (cancel lub close) już po upływie czasu timera
+                return
+            self.timers.discard(threading.current_thread())
+        self.run_in_pool(self.fetch, task, wait)
+
+    def cancel(self, futures):
+        """Anuluje zlecenia, także te czekające w timerze na limit tempa zapytań."""
+        for future in futures:
+            future.cancel()
+        with self.lock:
+            timers = [timer for timer in self.timers if timer.args[0].future in futures]
+            self.timers.difference_update(timers)
+        for timer in timers:
+            timer.cancel()
+            # Zwalniamy miejsce hosta, które zajmowało czekające zlecenie
+            self.finish(timer.args[0], error=CancelledError())
+
+    def fetch(self, task, wait):
+        url, site = task.url, task.site
+        fingerprint = self.fingerprints.get(site or url, "")
+        headers = self.validators.request_headers(url, fingerprint) if self.validators is not None else {}
+        handler = self.stream_handlers.get(site or url)
+        processed = content_hash = None
+        busy = 0.0
+        started = time.perf_counter()
+        response = self.session.get(url, headers=headers, timeout=self.timeout, stream=handler is not None)
+        if handler is not None and response.status_code == 200:
+            try:
+                processed, size, content_hash, busy = handler(response, url, site or url)
+            except Exception as e:
+                # Błąd przetwarzania strumieniowego dotyczy tylko tej strony
+                return FetchResult(url, site, task.page, error=e, wait=wait,
+                                   duration=time.perf_counter() - started)
+            finally:
+                # Nieprzeczytaną resztę odpowiedzi porzucamy razem z połączeniem
+                response.close()
+        else:
+            size = len(response.content)
+        # Czas przetwarzania strumieniowego nie wlicza się do pobierania
+        duration = time.perf_counter() - started - busy
+        if self.limiter is not None:
+            self.limiter.note_response(url, response)
+        unchanged, validator = False, None
+        if self.validators is not None:
+            unchanged, validator = self.validators.check(url, response, fingerprint, content_hash)
+        return FetchResult(url, site, task.page, response, unchanged=unchanged, wait=wait, duration=duration,
+                           size=size, processed=processed, validator=validator)
+
+    def batch(self, stop_event=None):
+        return FetchBatch(self, stop_event)
+
+    def close(self):
+        with self.lock:
+            timers, self.timers = self.timers, set()
+            waiting, self.waiting = self.waiting, {}
+        for timer in timers:
+            timer.cancel()
+        for tasks in waiting.values():
+            for task in tasks:
+                task.future.cancel()
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        if self.validators is not None:
+            self.validators.save()
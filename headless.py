@@ -0,0 +1,122 @@
+"""Przeszukiwarka przetargów bez interfejsu graficznego (serwer, cron).
+
+Przykłady:
+    python headless.py --once                      # jeden cykl, np. z crona
+    python headless.py --log-file przetargi.log    # praca ciągła co loop_time sekund
+    python headless.py --search "remont drog" --from 01.01.2025   # wyszukiwanie w zapisanych przetargach
+    python headless.py --rematch                   # ponowne dopasowanie zapisanych przetargów po zmianie słów
+"""
+import argparse
+import logging
+import os
+import signal
+import sys
+
+from app_config import CONFIG_FILE, DEFAULT_LOOP_TIME, load_config, site_rules
+from app_logging import setup_logging, DEFAULT_LOG_LEVEL
+from search_worker import SearchWorker
+from metrics import create_registry
+from tender_fields import parse_deadline
+from tender_pipeline import TenderPipeline, PipelineWriter
+from tender_store import TenderStore, STORE_FILE, MATCHED
+
+logger = logging.getLogger("headless")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Przeszukiwarka przetargów bez interfejsu graficznego.")
+    parser.add_argument("--config", default=CONFIG_FILE, help="plik konfiguracyjny (domyślnie config.json)")
+    parser.add_argument("--once", action="store_true", help="wykonaj jeden cykl i zakończ (np. dla crona)")
+    parser.add_argument("--interval", type=int, help="czas pętli w sekundach (domyślnie loop_time z konfiguracji)")
+    parser.add_argument("--log-file", help="dopisuj logi do tego pliku (z rotacją)")
+    parser.add_argument("--log-level", help="poziom logów: DEBUG, INFO, WARNING, ERROR (domyślnie INFO)")
+    parser.add_argument("--quiet", action="store_true", help="nie wypisuj logów na standardowe wyjście")
+    parser.add_argument("--metrics-file", help="zapisuj metryki po każdym cyklu do tego pliku (format Prometheusa)")
+    parser.add_argument("--metrics-port", type=int, help="udostępniaj metryki pod http://127.0.0.1:PORT/metrics")
+    parser.add_argument("--rematch", action="store_true",
+                        help="dopasuj zapisane przetargi do słów kluczowych z konfiguracji i zakończ")
+    search = parser.add_argument_group("wyszukiwanie w zapisanych przetargach (bez pobierania stron)")
+    search.add_argument("--search", metavar="TEKST",
+                        help="słowa z tytułu, zamawiającego lub regionu; polskie znaki i końcówki są pomijane")
+    search.add_argument("--from", dest="date_from", type=parse_date, help="termin od (dd.mm.rrrr)")
+    search.add_argument("--to", dest="date_to", type=parse_date, help="termin do (dd.mm.rrrr)")
+    search.add_argument("--matched", action="store_true", help="tylko przetargi spełniające kryteria")
+    search.add_argument("--limit", type=int, default=50, help="maksymalna liczba wyników (domyślnie 50)")
+    return parser.parse_args(argv)
+
+
+def parse_date(text):
+    parsed = parse_deadline(text)
+    if parsed is None:
+        raise argparse.ArgumentTypeError(f"nieprawidłowa data: {text}")
+    return parsed
+
+
+def search_store(args):
+    """Wypisuje zapisane przetargi pasujące do --search, --from i --to (najbliższe terminy na górze)."""
+    if not os.path.exists(STORE_FILE):
+        print(f"Brak bazy przetargów: {STORE_FILE}", file=sys.stderr)
+        return 1
+    store = TenderStore()
+    try:
+        rows, total = store.query(MATCHED if args.matched else None, args.search, "deadline", False, args.limit,
+                                  date_from=args.date_from, date_to=args.date_to)
+    finally:
+        store.close()
+    for title, link, keyword, deadline, buyer in rows:
+        print("\t".join((deadline or "", title, buyer or "", link)))
+    print(f"Znaleziono {total} przetargów, wyświetlono {len(rows)}.", file=sys.stderr)
+    return 0
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.search is not None or args.date_from or args.date_to:
+        return search_store(args)
+    config = load_config(args.config)
+    listener = setup_logging(args.log_level or config.get("log_level", DEFAULT_LOG_LEVEL),
+                             args.log_file or config.get("log_file"), console=not args.quiet)
+    if args.rematch:
+        # Bez pobierania stron - tylko ponowna klasyfikacja bazy i eksport do Excela
+        pipeline = TenderPipeline(config)
+        try:
+            pipeline.rematch(config.get("keywords", []))
+        finally:
+            pipeline.close(timeout=None)  # Czekamy na zakończenie eksportu do Excela
+            listener.stop()
+        return 0
+    sites, selectors = site_rules(config)
+    if not sites:
+        logger.error("Brak stron w konfiguracji.")
+        listener.stop()
+        return 1
+
+    interval = args.interval or config.get("loop_time", DEFAULT_LOOP_TIME)
+    pipeline = TenderPipeline(config)
+    # Zapis w osobnym wątku, żeby nie wstrzymywał pobierania i parsowania
+    metrics = create_registry(config, args.metrics_file, args.metrics_port)
+    writer = PipelineWriter(pipeline, metrics=metrics)
+    writer.start()
+    worker = SearchWorker(sites, selectors, config.get("keywords", []), writer.handle_new_tender, interval,
+                          writer.handle_all_results, writer.handle_unfiltered_tender, None, config,
+                          writer.flush, pipeline.is_known, metrics)
+    try:
+        if args.once:
+            worker.run_once()
+        else:
+            # SIGINT/SIGTERM kończą bieżący cykl i zapisują oczekujące dane
+            signal.signal(signal.SIGINT, lambda signum, frame: worker.stop())
+            signal.signal(signal.SIGTERM, lambda signum, frame: worker.stop())
+            worker.start()
+            while worker.is_alive():
+                worker.join(0.5)
+    finally:
+        writer.stop()
+        pipeline.close()
+        logger.info("Zakończono.")
+        listener.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,223 @@
+import codecs
+import re
+import time
+from functools import lru_cache
+
+from bs4 import BeautifulSoup, FeatureNotFound
+
+DEFAULT_PARSER = "html.parser"
+CHARSET_PATTERN = re.compile(r"charset=[\"']?([\w.:-]+)", re.I)
+PARSER_BACKENDS = ("html.parser", "lxml", "selectolax")
+
+
+class SelectolaxElement:
+    """Element z selectolax udostępniający te same metody co element BeautifulSoup."""
+
+    __slots__ = ("node",)
+
+    def __init__(self, node):
+        self.node = node
+
+    def get_text(self, strip=False):
+        return self.node.text(separator="", strip=strip)
+
+    def get(self, attribute, default=None):
+        value = self.node.attributes.get(attribute)
+        return default if value is None else value
+
+
+class LxmlElement:
+    """Element drzewa lxml (wynik XPath) z metodami jak w BeautifulSoup."""
+
+    __slots__ = ("node",)
+
+    def __init__(self, node):
+        self.node = node
+
+    def get_text(self, strip=False):
+        if strip:
+            return "".join(text.strip() for text in self.node.itertext())
+        return "".join(self.node.itertext())
+
+    def get(self, attribute, default=None):
+        return self.node.get(attribute, default)
+
+
+class CssSelector:
+    def __init__(self, expression):
+        import soupsieve
+
+        self.expression = expression
+        try:
+            self.compiled = soupsieve.compile(expression)  # Kompilacja raz, ponowne użycie w kolejnych cyklach
+        except soupsieve.SelectorSyntaxError as e:
+            raise ValueError(f"Nieprawidłowy selektor CSS: {expression} ({e})") from e
+
+    def select(self, document, limit=0):
+        root = document.css_root()
+        if isinstance(root, SelectolaxDocument):
+            elements = root.select(self.expression)
+            return elements[:limit] if limit else elements
+        return self.compiled.select(root, limit=limit)
+
+    def select_in(self, element):
+        """Pierwszy pasujący element wewnątrz podanego elementu (np. komórka w wierszu) lub None."""
+        if isinstance(element, SelectolaxElement):
+            node = element.node.css_first(self.expression)
+            return SelectolaxElement(node) if node is not None else None
+        if isinstance(element, LxmlElement):
+            raise ValueError(f"Selektor CSS {self.expression} nie działa w elemencie wybranym przez XPath")
+        return self.compiled.select_one(element)
+
+
+class XPathSelector:
+    def __init__(self, expression):
+        from lxml import etree
+
+        self.expression = expression
+        try:
+            self.compiled = etree.XPath(expression)
+        except etree.XPathError as e:
+            raise ValueError(f"Nieprawidłowe wyrażenie XPath: {expression} ({e})") from e
+
+    def select(self, document, limit=0):
+        return self.select_tree(document.lxml_tree(), limit)
+
+    def select_tree(self, tree, limit=0):
+        # XPath może zwracać też tekst lub atrybuty - interesują nas tylko elementy
+        elements = [LxmlElement(node) for node in self.compiled(tree) if hasattr(node, "tag")]
+        return elements[:limit] if limit else elements
+
+    def select_in(self, element):
+        if not isinstance(element, LxmlElement):
+            raise ValueError(f"Wyrażenie XPath {self.expression} działa tylko w elemencie wybranym przez XPath")
+        for node in self.compiled(element.node):
+            if hasattr(node, "tag"):
+                return LxmlElement(node)
+        return None
+
+
+def is_xpath(expression):
+    return expression.lstrip().startswith(("/", "./", "../", "("))
+
+
+@lru_cache(maxsize=1024)
+def compile_selector(expression):
+    """Rozpoznaje XPath lub selektor CSS i zwraca skompilowany selektor."""
+    if is_xpath(expression):
+        return XPathSelector(expression)
+    return CssSelector(expression)
+
+
+def to_xpath(expression):
+    """Selektor jako wyrażenie XPath (CSS tłumaczy pakiet cssselect); None, gdy nie da się go przetłumaczyć."""
+    if is_xpath(expression):
+        return expression
+    try:
+        from cssselect import HTMLTranslator, SelectorError
+    except ImportError:
+        return None
+    try:
+        return HTMLTranslator().css_to_xpath(expression, prefix=".//")
+    except SelectorError:
+        return None
+
+
+class SelectolaxDocument:
+    def __init__(self, content):
+        from selectolax.lexbor import LexborHTMLParser
+
+        self.tree = LexborHTMLParser(content)
+
+    def select(self, selector):
+        return [SelectolaxElement(node) for node in self.tree.css(selector)]
+
+
+def known_encoding(name):
+    # Nazwa kodowania z nagłówka lub strony, o ile Python je zna (np. "utf-8lol" pomijamy)
+    if not name:
+        return None
+    try:
+        return codecs.lookup(name).name
+    except LookupError:
+        return None
+
+
+def header_encoding(content_type):
+    """Kodowanie z nagłówka Content-Type (charset=...); None, gdy go nie podano lub jest nieznane."""
+    found = CHARSET_PATTERN.search(content_type or "")
+    return known_encoding(found.group(1)) if found else None
+
+
+def detect_encoding(content, partial=False):
+    """Kodowanie z deklaracji w HTML, a bez niej UTF-8 lub (dla starszych polskich stron) windows-1250.
+
+    partial oznacza początek dłuższej treści - może się on kończyć w połowie znaku wielobajtowego.
+    """
+    from bs4.dammit import EncodingDetector
+
+    declared = known_encoding(EncodingDetector.find_declared_encoding(content, is_html=True))
+    if declared:
+        return declared
+    try:
+        codecs.getincrementaldecoder("utf-8")().decode(content, final=not partial)
+        return "utf-8"
+    except UnicodeDecodeError:
+        return "windows-1250"
+
+
+class Document:
+    """Pobrana strona parsowana leniwie: drzewo dla CSS wybranym silnikiem, drzewo lxml tylko dla XPath."""
+
+    def __init__(self, content, backend=DEFAULT_PARSER):
+        self.content = content
+        self.backend = backend
+        self.parses = 0  # Liczba faktycznie zbudowanych drzew
+        self.parse_time = 0.0  # Łączny czas budowania drzew w sekundach
+        self._css_root = None
+        self._lxml_tree = None
+
+    def css_root(self):
+        if self._css_root is None:
+            started = time.perf_counter()
+            if self.backend == "selectolax":
+                self._css_root = SelectolaxDocument(self.content)
+            else:
+                self._css_root = BeautifulSoup(self.content, self.backend)
+            self.parse_time += time.perf_counter() - started
+            self.parses += 1
+        return self._css_root
+
+    def lxml_tree(self):
+        if self._lxml_tree is None:
+            import lxml.html
+
+            started = time.perf_counter()
+            parser = lxml.html.HTMLParser(encoding=detect_encoding(self.content))
+            self._lxml_tree = lxml.html.document_fromstring(self.content, parser=parser)
+            self.parse_time += time.perf_counter() - started
+            self.parses += 1
+        return self._lxml_tree
+
+    def select(self, selector, limit=0):
+        if isinstance(selector, str):
+            selector = compile_selector(selector)
+        return selector.select(self, limit)
+
+
+def backend_available(backend):
+    if backend not in PARSER_BACKENDS:
+        return False
+    try:
+        if backend == "selectolax":
+            import selectolax.lexbor  # noqa: F401
+        elif backend == "lxml":
+            BeautifulSoup("", "lxml")
+    except (ImportError, FeatureNotFound):
+        return False
+    return True
+
+
+def parse_document(content, backend=DEFAULT_PARSER):
+    """Zwraca dokument obsługujący select(selektor) dla CSS i XPath; drzewa budowane są przy pierwszym użyciu."""
+    return Document(content, backend)
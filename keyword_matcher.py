@@ -0,0 +1,100 @@
+import bisect
+import itertools
+import re
+import unicodedata
+
+# Polskie znaki diakrytyczne (ł nie rozkłada się w NFKD, dlatego mapujemy je jawnie); str.replace dla
+# kolejnych znaków jest wielokrotnie szybsze od str.translate, co ma znaczenie przy długich tekstach
+POLISH_CHARS = tuple(zip("ąćęłńóśźż", "acelnoszz"))
+
+
+def normalize_text(text):
+    """Małe litery i usunięcie znaków diakrytycznych, np. 'Usługi' -> 'uslugi'."""
+    text = text.casefold()
+    if text.isascii():
+        return text
+    for char, replacement in POLISH_CHARS:
+        if char in text:
+            text = text.replace(char, replacement)
+    if not text.isascii():
+        text = "".join(c for c in unicodedata.normalize("NFKD", text) if not unicodedata.combining(c))
+    return text
+
+
+def trie_pattern(words):
+    """Buduje wyrażenie w kształcie drzewa prefiksów, np. ['remont', 'renowacja'] -> 're(?:mont|nowacja)'."""
+    trie = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[""] = {}  # Koniec słowa
+
+    def build(node):
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        if "" in node:
+            # Koniec krótszego słowa - dłuższa kontynuacja jest opcjonalna (zachłanna)
+            body = "(?:" + body + ")?"
+        return body
+
+    return build(trie)
+
+
+class KeywordMatcher:
+    """Dopasowuje wszystkie słowa kluczowe do tytułu jednym przejściem skompilowanego wyrażenia regularnego."""
+
+    def __init__(self, keywords):
+        self.keywords = {}  # Znormalizowane słowo -> słowo w pierwotnej postaci z konfiguracji
+        for keyword in keywords:
+            normalized = normalize_text(keyword.strip())
+            if normalized and normalized not in self.keywords:
+                self.keywords[normalized] = keyword.strip()
+        self.order = {normalized: i for i, normalized in enumerate(self.keywords)}
+
+        # Słowa zawarte w innych słowach (np. 'remont' w 'remonty') - wyrażenie zwraca w danym miejscu
+        # tylko najdłuższe dopasowanie, więc krótsze dopisujemy na tej podstawie
+        self.contained = {
+            normalized: [other for other in self.keywords if other != normalized and other in normalized]
+            for normalized in self.keywords
+        }
+
+        if self.keywords:
+            # Lookahead pozwala znaleźć dopasowania nachodzące na siebie, a drzewo prefiksów sprawia,
+            # że koszt sprawdzenia pozycji nie rośnie liniowo z liczbą słów
+            self.pattern = re.compile("(?=(" + trie_pattern(self.keywords) + "))")
+        else:
+            self.pattern = None
+
+    def match_normalized(self, normalized_title):
+        if self.pattern is None:
+            return []
+        return self.ordered(match.group(1) for match in self.pattern.finditer(normalized_title))
+
+    def ordered(self, matched):
+        # Dopasowane słowa razem z zawartymi w nich krótszymi, w kolejności z konfiguracji
+        found = set()
+        for keyword in matched:
+            if keyword not in found:
+                found.add(keyword)
+                found.update(self.contained[keyword])
+        return [self.keywords[keyword] for keyword in sorted(found, key=self.order.__getitem__)]
+
+    def match(self, title):
+        """Zwraca wszystkie dopasowane słowa kluczowe w kolejności z konfiguracji."""
+        return self.match_normalized(normalize_text(title))
+
+    def match_many(self, titles):
+        """Jak match dla listy tytułów; normalizacja i wyszukiwanie jednym przejściem po połączonym tekście."""
+        if self.pattern is None:
+            return [[] for _ in titles]
+        # Znak nowej linii rozdziela tytuły, więc nie może wystąpić w żadnym z nich
+        normalized = normalize_text("\n".join(title.replace("\n", " ") for title in titles))
+        starts = [0]
+        starts.extend(itertools.accumulate(len(line) + 1 for line in normalized.split("\n")))
+        matched = {}  # Indeks tytułu -> znalezione słowa
+        for match in self.pattern.finditer(normalized):
+            matched.setdefault(bisect.bisect_right(starts, match.start()) - 1, []).append(match.group(1))
+        return [self.ordered(matched[index]) if index in matched else [] for index in range(len(titles))]
@@ -1,16 +1,21 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
-import requests
-from bs4 import BeautifulSoup
-import pandas as pd
 import os
 import json
-import threading
-import time
-from urllib.parse import urljoin
-from queue import Queue, Empty
+import logging
+import multiprocessing
 from PIL import Image, ImageTk
 
+from app_config import CONFIG_FILE, load_config, site_rules
+from app_logging import setup_logging, DEFAULT_LOG_LEVEL, LOG_FILE
+from results_view import ResultsView, DEFAULT_RESULTS_LIMIT
+from search_worker import SearchWorker
+from metrics import create_registry
+from tender_pipeline import TenderPipeline, PipelineWriter
+from ui_bridge import UiBridge, ProgressEvent, TenderEvent, RematchEvent, UI_REFRESH_MS
+
+logger = logging.getLogger("gui")
+
 
 # Funkcja do dynamicznego wyszukiwania pliku z ikoną
 def find_logo():
@@ -22,89 +27,6 @@ def find_logo():
         return None
 
 
-CONFIG_FILE = os.path.join(os.getcwd(), "config.json")
-EXCEL_FILE = os.path.join(os.getcwd(), "wszystkie_przetargi.xlsx")  # Plik do przechowywania wszystkich przetargów
-
-
-class SearchWorker(threading.Thread):
-    def __init__(self, sites, selectors, keywords, log_callback, result_callback, interval, all_results_callback,
-                 unfiltered_callback, progress_bar):
-        super().__init__()
-        self.sites = sites
-        self.selectors = selectors
-        self.keywords = keywords
-        self.log_callback = log_callback
-        self.result_callback = result_callback
-        self.interval = interval
-        self.all_results_callback = all_results_callback  # Callback do zapisywania wszystkich przetargów
-        self.unfiltered_callback = unfiltered_callback  # Callback do zapisywania niespełniających kryteriów
-        self.stop_event = threading.Event()
-        self.progress_bar = progress_bar  # Pasek ładowania
-
-    def run(self):
-        total_steps = 100  # Pasek postępu ma 100 kroków
-        step_duration = self.interval / total_steps  # Czas trwania jednego kroku
-
-        while not self.stop_event.is_set():
-            self.perform_search()
-
-            # Resetujemy pasek postępu
-            self.progress_bar['value'] = 0
-            self.log_callback(f"Przerwa {self.interval} sekund przed kolejnym wyszukiwaniem...")
-
-            for i in range(total_steps):
-                if self.stop_event.is_set():
-                    return
-                time.sleep(step_duration)  # Czekamy odpowiednią liczbę sekund
-                self.progress_bar.after(0, self.progress_bar.step, 1)  # Zlecamy aktualizację paska w głównym wątku
-
-    def perform_search(self):
-        self.log_callback(f"Rozpoczynam przeszukiwanie stron: {self.sites}")
-        for site, selector_list in zip(self.sites, self.selectors):
-            self.log_callback(f"Przeszukuję stronę: {site}")
-            for selector in selector_list:
-                self.log_callback(f"Używam selektora: {selector}")
-                try:
-                    response = requests.get(site, timeout=10)
-                    self.log_callback(f"Otrzymano odpowiedź od strony: {site} - Status kodu: {response.status_code}")
-                except requests.exceptions.RequestException as e:
-                    self.log_callback(f"Błąd podczas pobierania strony: {site}\nSzczegóły: {e}")
-                    continue
-
-                soup = BeautifulSoup(response.content, 'html.parser')
-                tenders = soup.select(selector)[:20]
-                self.log_callback(f"Znaleziono {len(tenders)} przetargów na stronie: {site}")
-
-                for tender in tenders:
-                    title = tender.get_text(strip=True)
-                    link = tender.get('href')
-                    if not link:
-                        self.log_callback(f"Pominięto przetarg bez linku: {title}")
-                        continue
-                    link = urljoin(site, link)
-
-                    # Logowanie zapisywania wszystkich przetargów
-                    self.log_callback(f"Zapisuję wszystkie przetargi: Tytuł: {title}, Link: {link}")
-                    self.all_results_callback(title, link)
-
-                    found_keyword = False
-                    # Logowanie sprawdzania słów kluczowych
-                    for keyword in self.keywords:
-                        self.log_callback(f"Sprawdzam słowo kluczowe '{keyword}' w tytule przetargu: {title}")
-                        if keyword.lower() in title.lower():
-                            self.log_callback(f"Znaleziono dopasowanie słowa kluczowego '{keyword}' w tytule: {title}")
-                            self.result_callback(title, link, keyword)
-                            found_keyword = True
-                            break
-
-                    if not found_keyword:
-                        self.log_callback(f"Brak dopasowania dla tytułu: {title}")
-                        self.unfiltered_callback(title, link)
-
-    def stop(self):
-        self.log_callback("Zatrzymywanie wyszukiwania...")
-        self.stop_event.set()
-
 class MainWindow(tk.Tk):
     def __init__(self):
         super().__init__()
@@ -117,23 +39,28 @@ class MainWindow(tk.Tk):
             try:
                 self.iconbitmap(icon_path)  # Używamy pliku .ico
             except Exception as e:
-                print(f"Błąd podczas ustawiania ikony: {e}")
+                logger.warning("Błąd podczas ustawiania ikony: %s", e)
         else:
-            print("Ikona aplikacji nie została znaleziona.")
+            logger.warning("Ikona aplikacji nie została znaleziona.")
 
-        # Inicjalizacja kolejki logów
-        self.log_queue = Queue()
+        # Postęp i nowe przetargi z innych wątków trafiają do GUI tylko przez kolejkę zdarzeń
+        self.bridge = UiBridge()
 
-        self.data_memory = set()  # Pamięć dla wyników dopasowanych do słów kluczowych
-        self.all_data_memory = set()  # Pamięć dla wszystkich wyników, aby uniknąć duplikatów
         self.config_data = self.load_config()
         self.search_thread = None
+        # Baza, indeks duplikatów i eksport do Excela; zapis w osobnym wątku, poza wątkiem wyszukiwania i GUI
+        self.pipeline = TenderPipeline(self.config_data)
+        # Metryki cykli są wspólne dla kolejnych uruchomień wyszukiwania
+        self.metrics = create_registry(self.config_data)
+        self.writer = PipelineWriter(self.pipeline, self.bridge.tender, self.metrics)
+        self.writer.start()
 
         self.create_widgets()
         self.load_data_from_config()
 
-        # Sprawdzanie kolejki co 100 ms
-        self.after(100, self.check_log_queue)
+        # Sprawdzanie kolejki zdarzeń co 100 ms
+        self.after(UI_REFRESH_MS, self.process_ui_events)
+        self.protocol("WM_DELETE_WINDOW", self.on_close)
 
     def create_widgets(self):
         self.tabControl = ttk.Notebook(self)
@@ -203,7 +130,7 @@ class MainWindow(tk.Tk):
         self.tabControl.add(self.selectors_frame, text="Selektory")
 
         # Nagłówek dla selektorów
-        selector_label = tk.Label(self.selectors_frame, text="Dodaj nowy selektor CSS", font=("Arial", 12, "bold"))
+        selector_label = tk.Label(self.selectors_frame, text="Dodaj nowy selektor CSS lub XPath", font=("Arial", 12, "bold"))
         selector_label.pack(pady=(20, 5))
 
         # Pole do wpisywania selektora
@@ -228,12 +155,15 @@ class MainWindow(tk.Tk):
         self.results_frame = ttk.Frame(self.tabControl)
         self.tabControl.add(self.results_frame, text="Wyniki")
 
-        self.results_tree = ttk.Treeview(self.results_frame, columns=("Tytuł", "Link", "Słowo kluczowe"),
-                                         show="headings")
-        self.results_tree.heading("Tytuł", text="Tytuł")
-        self.results_tree.heading("Link", text="Link")
-        self.results_tree.heading("Słowo kluczowe", text="Słowo kluczowe")
-        self.results_tree.pack(padx=10, pady=10, fill=tk.BOTH, expand=True)
+        # Widok ograniczony do results_limit wierszy; pozostałe przetargi są dostępne przez wyszukiwanie w bazie
+        self.results_view = ResultsView(self.results_frame, self.pipeline.store,
+                                        self.config_data.get("results_limit", DEFAULT_RESULTS_LIMIT))
+        self.results_view.pack(fill=tk.BOTH, expand=True)
+        self.results_view.refresh()
+
+        # Eksport wykonują wątki zapisu, więc okno nie przestaje reagować nawet przy dużej bazie
+        export_button = tk.Button(self.results_frame, text="Eksportuj do Excela", command=self.writer.export_to_excel)
+        export_button.pack(pady=(0, 10))
 
         # Zakładka pomoc
         self.help_frame = ttk.Frame(self.tabControl)
@@ -251,6 +181,9 @@ class MainWindow(tk.Tk):
     Przykład selektora CSS:
     - div.article > h1.title
     - #main-content > div > p
+
+    Można też podać wyrażenie XPath (zaczynające się od "/"), np. z opcji "Copy" > "Copy XPath":
+    - //li[contains(@class, 'tender-item')]//h3[@class='tTitle']/a
     """
         help_label = tk.Label(self.help_frame, text=help_text, justify="left")
         help_label.pack(padx=10, pady=10, fill=tk.BOTH, expand=True)
@@ -258,22 +191,15 @@ class MainWindow(tk.Tk):
         self.tabControl.pack(expand=1, fill="both")
 
     def load_config(self):
-        if os.path.exists(CONFIG_FILE):
-            try:
-                with open(CONFIG_FILE, 'r') as f:
-                    return json.load(f)
-            except json.JSONDecodeError:
-                self.log_message("Błąd podczas wczytywania pliku konfiguracyjnego.")
-                return {"urls": [], "keywords": [], "loop_time": 30}
-        return {"urls": [], "keywords": [], "loop_time": 30}
+        return load_config(CONFIG_FILE)
 
     def save_config(self):
         try:
             with open(CONFIG_FILE, 'w') as f:
                 json.dump(self.config_data, f, indent=4)
-            self.log_message("Plik konfiguracyjny został zapisany.")
+            logger.info("Plik konfiguracyjny został zapisany.")
         except IOError as e:
-            self.log_message(f"Błąd podczas zapisywania pliku konfiguracyjnego: {e}")
+            logger.error("Błąd podczas zapisywania pliku konfiguracyjnego: %s", e)
 
     def load_data_from_config(self):
         for site_data in self.config_data["urls"]:
@@ -281,31 +207,31 @@ class MainWindow(tk.Tk):
             selectors = ", ".join(site_data["selectors"])
             self.sites_listbox.insert(tk.END, url)
             self.selectors_tree.insert("", "end", values=(url, selectors))
-        self.log_message("Wczytano konfigurację stron i selektorów.")
+        logger.info("Wczytano konfigurację stron i selektorów.")
 
         for keyword in self.config_data["keywords"]:
             self.keywords_listbox.insert(tk.END, keyword)
-        self.log_message("Wczytano słowa kluczowe.")
+        logger.info("Wczytano słowa kluczowe.")
 
         self.loop_time_entry.insert(0, str(self.config_data.get("loop_time", 30)))
-        self.log_message(f"Ustawiono czas pętli na {self.config_data.get('loop_time', 30)} sekund.")
+        logger.info("Ustawiono czas pętli na %s sekund.", self.config_data.get('loop_time', 30))
 
     def add_site(self):
         url = self.site_entry.get()
         if self.is_valid_url(url):
             if url in self.sites_listbox.get(0, tk.END):
                 messagebox.showerror("Błąd", "Ta strona jest już dodana.")
-                self.log_message(f"Strona {url} jest już na liście.")
+                logger.warning("Strona %s jest już na liście.", url)
             else:
                 self.sites_listbox.insert(tk.END, url)
                 self.config_data["urls"].append({"url": url, "selectors": []})
                 self.save_config()
                 self.site_entry.delete(0, tk.END)
                 self.refresh_selectors_tree()  # Odśwież selektory po dodaniu strony
-                self.log_message(f"Dodano nową stronę: {url}")
+                logger.info("Dodano nową stronę: %s", url)
         else:
             messagebox.showerror("Błędny URL", "Wprowadź poprawny adres URL.")
-            self.log_message(f"Podano nieprawidłowy URL: {url}")
+            logger.warning("Podano nieprawidłowy URL: %s", url)
 
     def remove_site(self):
         selected = self.sites_listbox.curselection()
@@ -315,7 +241,7 @@ class MainWindow(tk.Tk):
             self.config_data["urls"] = [site for site in self.config_data["urls"] if site["url"] != url]
             self.save_config()
             self.refresh_selectors_tree()  # Odśwież selektory po usunięciu strony
-            self.log_message(f"Usunięto stronę: {url}")
+            logger.info("Usunięto stronę: %s", url)
 
     def add_selector(self):
         selected = self.selectors_tree.focus()
@@ -329,20 +255,23 @@ class MainWindow(tk.Tk):
                         self.save_config()
                         self.refresh_selectors_tree()
                         self.selector_entry.delete(0, tk.END)
-                        self.log_message(f"Dodano selektor: {selector} dla strony: {url}")
+                        logger.info("Dodano selektor: %s dla strony: %s", selector, url)
                         return
             else:
                 messagebox.showerror("Błąd", "Wprowadź selektor przed dodaniem.")
-                self.log_message("Nie wprowadzono selektora.")
+                logger.warning("Nie wprowadzono selektora.")
         else:
             messagebox.showerror("Błąd", "Wybierz stronę przed dodaniem selektora.")
-            self.log_message("Nie wybrano strony.")
+            logger.warning("Nie wybrano strony.")
 
     def remove_selector(self):
         selected = self.selectors_tree.focus()
         if selected:
-            url, selectors = self.selectors_tree.item(selected)["values"]
-            selectors_list = selectors.split(", ")
+            url = self.selectors_tree.item(selected)["values"][0]
+            # Selektory bierzemy z konfiguracji - tekst w tabeli jest tylko do podglądu, a przecinki
+            # występują też wewnątrz selektorów (np. XPath z contains(@class, '...'))
+            selectors_list = next((list(site["selectors"]) for site in self.config_data["urls"]
+                                   if site["url"] == url), [])
             if selectors_list:
                 selector_to_remove = self.selector_entry.get()
                 if selector_to_remove in selectors_list:
@@ -352,17 +281,17 @@ class MainWindow(tk.Tk):
                             site["selectors"] = selectors_list
                             self.save_config()
                             self.refresh_selectors_tree()
-                            self.log_message(f"Usunięto selektor: {selector_to_remove} dla strony: {url}")
+                            logger.info("Usunięto selektor: %s dla strony: %s", selector_to_remove, url)
                             return
                 else:
                     messagebox.showerror("Błąd", "Selekcja nie istnieje.")
-                    self.log_message("Selekcja nie istnieje.")
+                    logger.warning("Selekcja nie istnieje.")
             else:
                 messagebox.showerror("Błąd", "Brak selektorów do usunięcia.")
-                self.log_message("Brak selektorów do usunięcia.")
+                logger.warning("Brak selektorów do usunięcia.")
         else:
             messagebox.showerror("Błąd", "Wybierz selektor do usunięcia.")
-            self.log_message("Nie wybrano selektora do usunięcia.")
+            logger.warning("Nie wybrano selektora do usunięcia.")
 
     def refresh_selectors_tree(self):
         for item in self.selectors_tree.get_children():
@@ -371,7 +300,7 @@ class MainWindow(tk.Tk):
             url = site_data["url"]
             selectors = ", ".join(site_data["selectors"])
             self.selectors_tree.insert("", "end", values=(url, selectors))
-        self.log_message("Odświeżono widok selektorów.")
+        logger.debug("Odświeżono widok selektorów.")
 
     def add_keyword(self):
         keyword = self.keyword_entry.get()
@@ -380,10 +309,11 @@ class MainWindow(tk.Tk):
             self.config_data["keywords"].append(keyword)
             self.save_config()
             self.keyword_entry.delete(0, tk.END)
-            self.log_message(f"Dodano nowe słowo kluczowe: {keyword}")
+            logger.info("Dodano nowe słowo kluczowe: %s", keyword)
+            self.rematch_keywords()
         else:
             messagebox.showerror("Błąd", "Wprowadź słowo kluczowe.")
-            self.log_message("Nie wprowadzono słowa kluczowego.")
+            logger.warning("Nie wprowadzono słowa kluczowego.")
 
     def remove_keyword(self):
         selected = self.keywords_listbox.curselection()
@@ -392,10 +322,18 @@ class MainWindow(tk.Tk):
             self.keywords_listbox.delete(selected[0])
             self.config_data["keywords"] = [kw for kw in self.config_data["keywords"] if kw != keyword]
             self.save_config()
-            self.log_message(f"Usunięto słowo kluczowe: {keyword}")
+            logger.info("Usunięto słowo kluczowe: %s", keyword)
+            self.rematch_keywords()
         else:
             messagebox.showerror("Błąd", "Wybierz słowo kluczowe do usunięcia.")
-            self.log_message("Nie wybrano słowa kluczowego do usunięcia.")
+            logger.warning("Nie wybrano słowa kluczowego do usunięcia.")
+
+    def rematch_keywords(self):
+        # Nowa lista obowiązuje od następnego cyklu, a zapisane przetargi są klasyfikowane ponownie w wątku zapisu
+        keywords = [self.keywords_listbox.get(i) for i in range(self.keywords_listbox.size())]
+        if self.search_thread is not None:
+            self.search_thread.keywords = keywords
+        self.writer.rematch(keywords, self.bridge.rematched)
 
     def accept_time_interval(self):
         try:
@@ -403,160 +341,102 @@ class MainWindow(tk.Tk):
             self.config_data["loop_time"] = loop_time
             self.save_config()
             messagebox.showinfo("Sukces", f"Czas pętli został ustawiony na {loop_time} sekund.")
-            self.log_message(f"Ustawiono czas pętli na {loop_time} sekund.")
+            logger.info("Ustawiono czas pętli na %s sekund.", loop_time)
         except ValueError:
             messagebox.showerror("Błąd", "Wprowadź poprawny czas pętli w sekundach.")
-            self.log_message("Nieprawidłowa wartość dla czasu pętli.")
+            logger.warning("Nieprawidłowa wartość dla czasu pętli.")
 
     def start_search(self):
         if self.search_thread is not None and self.search_thread.is_alive():
             messagebox.showerror("Błąd", "Wyszukiwanie jest już w toku.")
-            self.log_message("Wyszukiwanie już działa.")
+            logger.warning("Wyszukiwanie już działa.")
             return
 
         try:
             loop_time = int(self.loop_time_entry.get())
         except ValueError:
             messagebox.showerror("Błąd", "Wprowadź poprawny czas pętli w sekundach.")
-            self.log_message("Nieprawidłowa wartość czasu pętli.")
+            logger.warning("Nieprawidłowa wartość czasu pętli.")
             return
 
         if not self.keywords_listbox.size():
             messagebox.showerror("Błąd", "Dodaj przynajmniej jedno słowo kluczowe.")
-            self.log_message("Brak słów kluczowych.")
+            logger.warning("Brak słów kluczowych.")
             return
 
         if not self.selectors_tree.get_children():
             messagebox.showerror("Błąd", "Dodaj przynajmniej jeden selektor.")
-            self.log_message("Brak selektorów.")
+            logger.warning("Brak selektorów.")
             return
 
         self.config_data["loop_time"] = loop_time
         self.save_config()
 
-        sites = [self.sites_listbox.get(i) for i in range(self.sites_listbox.size())]
-        selectors = [self.selectors_tree.item(item, "values")[1].split(", ") for item in
-                     self.selectors_tree.get_children()]
+        # Tak jak w trybie bez okna - selektory z konfiguracji, a nie z tekstu wyświetlanego w tabeli
+        sites, selectors = site_rules(self.config_data)
         keywords = [self.keywords_listbox.get(i) for i in range(self.keywords_listbox.size())]
 
-        self.log_message(
-            f"Rozpoczynam wyszukiwanie: strony={sites}, selektory={selectors}, słowa kluczowe={keywords}, czas pętli={loop_time} sekund")
+        logger.info("Rozpoczynam wyszukiwanie: strony=%s, selektory=%s, słowa kluczowe=%s, czas pętli=%s sekund",
+                    sites, selectors, keywords, loop_time)
 
-        self.search_thread = SearchWorker(sites, selectors, keywords, self.log_message, self.handle_new_tender,
-                                          loop_time, self.handle_all_results, self.handle_unfiltered_tender,
-                                          self.progress_bar)
+        self.search_thread = SearchWorker(sites, selectors, keywords,
+                                          self.writer.handle_new_tender, loop_time, self.writer.handle_all_results,
+                                          self.writer.handle_unfiltered_tender, self.bridge.progress,
+                                          self.config_data, self.writer.flush, self.pipeline.is_known,
+                                          self.metrics)
         self.search_thread.start()
 
     def stop_search(self):
         if self.search_thread is not None:
             self.search_thread.stop()
-            self.log_message("Wyszukiwanie zostało zatrzymane.")
+            logger.info("Wyszukiwanie zostało zatrzymane.")
+            self.writer.flush()
             messagebox.showinfo("Sukces", "Wyszukiwanie zostało zatrzymane.")
 
-    def handle_new_tender(self, title, link, keyword):
-        if title not in self.data_memory:
-            self.data_memory.add(title)
-            self.save_filtered_tender(title, link)  # Zapisujemy do pliku przetargi spełniające kryteria
-            self.after(0, lambda: self.add_result_to_view(title, link, keyword))  # Użycie after
-            self.log_message(f"Znaleziono przetarg: Tytuł: {title}, Link: {link}, Słowo kluczowe: {keyword}")
-
-    def save_unfiltered_tender(self, title, link):
-        data = {'Tytuł': [title], 'Link': [link]}
-        df_new = pd.DataFrame(data)
-        try:
-            if os.path.exists("unfiltered_przetargi.xlsx"):
-                df_existing = pd.read_excel("unfiltered_przetargi.xlsx")
-
-                # Sprawdzenie, czy link już istnieje
-                if link in df_existing['Link'].values:
-                    self.log_message(f"Link już istnieje w pliku: {link}")
-                    return
-
-                # Połączenie istniejących danych z nowymi
-                df_combined = pd.concat([df_existing, df_new], ignore_index=True)
-                df_combined.to_excel("unfiltered_przetargi.xlsx", index=False)
-            else:
-                df_new.to_excel("unfiltered_przetargi.xlsx", index=False)
-            self.log_message(f"Zapisano przetarg niespełniający kryteriów: {title}")
-        except Exception as e:
-            self.log_message(f"Błąd podczas zapisu przetargu niespełniającego kryteriów: {title}\nSzczegóły: {e}")
-
-    def save_filtered_tender(self, title, link):
-        data = {'Tytuł': [title], 'Link': [link]}
-        df_new = pd.DataFrame(data)
-        try:
-            if os.path.exists("filtered_przetargi.xlsx"):
-                df_existing = pd.read_excel("filtered_przetargi.xlsx")
-
-                # Sprawdzenie, czy link już istnieje
-                if link in df_existing['Link'].values:
-                    self.log_message(f"Link już istnieje w pliku: {link}")
-                    return
-
-                # Połączenie istniejących danych z nowymi
-                df_combined = pd.concat([df_existing, df_new], ignore_index=True)
-                df_combined.to_excel("filtered_przetargi.xlsx", index=False)
-            else:
-                df_new.to_excel("filtered_przetargi.xlsx", index=False)
-            self.log_message(f"Zapisano przetarg do pliku filtrowanych przetargów: {title}")
-        except Exception as e:
-            self.log_message(f"Błąd podczas zapisu przetargu do pliku filtrowanego: {title}\nSzczegóły: {e}")
-
-    def save_all_tender(self, title, link):
-        data = {'Tytuł': [title], 'Link': [link]}
-        df_new = pd.DataFrame(data)
-        try:
-            if os.path.exists(EXCEL_FILE):
-                df_existing = pd.read_excel(EXCEL_FILE)
-
-                # Sprawdzenie, czy link już istnieje
-                if link in df_existing['Link'].values:
-                    self.log_message(f"Link już istnieje w pliku: {link}")
-                    return
-
-                # Połączenie istniejących danych z nowymi
-                df_combined = pd.concat([df_existing, df_new], ignore_index=True)
-                df_combined.to_excel(EXCEL_FILE, index=False)
-            else:
-                df_new.to_excel(EXCEL_FILE, index=False)
-            self.log_message(f"Zapisano przetarg do pliku z wszystkimi przetargami: {title}")
-        except Exception as e:
-            self.log_message(f"Błąd podczas zapisu przetargu do pliku wszystkich przetargów: {title}\nSzczegóły: {e}")
-
-    def add_result_to_view(self, title, link, keyword):
-        self.results_tree.insert("", "end", values=(title, link, keyword))
-
-    def log_message(self, message):
-        self.log_queue.put(message)  # Zapis logu do kolejki
+    def process_ui_events(self):
+        # Jedyne miejsce, w którym zdarzenia z innych wątków zmieniają widżety
+        tenders = []
+        progress = None
+        rematched = False
+        for event in self.bridge.drain():
+            if isinstance(event, TenderEvent):
+                tenders.append(event.tender)
+            elif isinstance(event, ProgressEvent):
+                progress = event.value  # Liczy się tylko ostatni stan paska
+            elif isinstance(event, RematchEvent):
+                rematched = rematched or event.changed > 0
+        if rematched:
+            # Przetargi zmieniły klasyfikację, więc widok wczytujemy ponownie z bazy
+            self.results_view.refresh()
+        else:
+            self.results_view.add_tenders(tenders)  # Nowe przetargi trafiają do widoku partiami
+        if progress is not None:
+            self.progress_bar.config(value=progress)
+        # Przy zaległych zdarzeniach kolejny przebieg od razu, w przeciwnym razie co 100 ms
+        self.after(1 if self.bridge.pending() else UI_REFRESH_MS, self.process_ui_events)
 
-    def check_log_queue(self):
-        try:
-            while True:
-                message = self.log_queue.get_nowait()
-                print(message)  # Logi do konsoli
-        except Empty:
-            pass
-        self.after(100, self.check_log_queue)  # Kontynuuj sprawdzanie co 100 ms
+    def on_close(self):
+        if self.search_thread is not None:
+            self.search_thread.stop()
+            self.search_thread.join(timeout=5)
+        self.writer.stop()
+        self.pipeline.close()
+        self.destroy()
 
     def is_valid_url(self, url):
         from urllib.parse import urlparse
         parsed = urlparse(url)
         return all([parsed.scheme, parsed.netloc])
 
-    def handle_all_results(self, title, link):
-        """Metoda obsługująca wszystkie przetargi, niezależnie od słów kluczowych."""
-        if title not in self.all_data_memory:
-            self.all_data_memory.add(title)
-            self.save_all_tender(title, link)
-            self.log_message(f"Zapisano przetarg bez filtrowania: Tytuł: {title}, Link: {link}")
-
-    def handle_unfiltered_tender(self, title, link):
-        if title not in self.all_data_memory:
-            self.all_data_memory.add(title)
-            self.save_unfiltered_tender(title, link)  # Zapisujemy przetargi niespełniające kryteriów
-            self.log_message(f"Zapisano przetarg niespełniający kryteriów: Tytuł: {title}, Link: {link}")
-
 
 if __name__ == "__main__":
+    # W programie zbudowanym przez PyInstaller procesy robocze puli (process_workers) uruchamiają ten sam plik exe;
+    # bez tego wywołania każdy z nich otworzyłby kolejne okno
+    multiprocessing.freeze_support()
+    # Logi trafiają na konsolę i do pliku z rotacją; zapis odbywa się w osobnym wątku
+    startup_config = load_config(CONFIG_FILE)
+    log_listener = setup_logging(startup_config.get("log_level", DEFAULT_LOG_LEVEL),
+                                 startup_config.get("log_file", LOG_FILE))
     app = MainWindow()
     app.mainloop()
+    log_listener.stop()
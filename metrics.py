@@ -0,0 +1,227 @@
+import json
+import logging
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Etapy przetwarzania strony, dla których mierzymy czas; "response" to czas do otrzymania nagłówków odpowiedzi
+# (połączenie i oczekiwanie na serwer), "download" - pobieranie treści
+STAGES = ("wait", "response", "download", "parse", "select", "match", "persist")
+COUNTERS = ("fetches", "unchanged", "errors", "bytes", "found", "new", "duplicates")
+
+logger = logging.getLogger(__name__)
+
+
+class SiteMetrics:
+    """Liczniki i czasy etapów dla jednej strony z konfiguracji."""
+
+    __slots__ = COUNTERS + STAGES
+
+    def __init__(self):
+        for name in COUNTERS:
+            setattr(self, name, 0)
+        for name in STAGES:
+            setattr(self, name, 0.0)
+
+    def add(self, other):
+        for name in self.__slots__:
+            setattr(self, name, getattr(self, name) + getattr(other, name))
+
+    def as_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class CycleMetrics:
+    """Pomiary jednego cyklu wyszukiwania; po zakończeniu cyklu służą jako jego podsumowanie."""
+
+    def __init__(self):
+        self.started = time.time()
+        self.duration = None
+        self.sites = {}  # Strona -> SiteMetrics
+        self.persisted = False  # Czas zapisu przetargów z cyklu został już dopisany
+
+    def site(self, site):
+        metrics = self.sites.get(site)
+        if metrics is None:
+            metrics = self.sites[site] = SiteMetrics()
+        return metrics
+
+    def finish(self, duration):
+        self.duration = duration
+
+    def totals(self):
+        total = SiteMetrics()
+        for metrics in self.sites.values():
+            total.add(metrics)
+        return total
+
+    def as_record(self):
+        """Podsumowanie cyklu jako słownik (np. do zapisu w JSON)."""
+        return {
+            "started": self.started,
+            "duration": self.duration,
+            "totals": self.totals().as_dict(),
+            "sites": {site: metrics.as_dict() for site, metrics in self.sites.items()},
+        }
+
+    def log_summary(self):
+        if not logger.isEnabledFor(logging.INFO):
+            return
+        for site, metrics in sorted(self.sites.items()):
+            logger.info("Metryki %s: pobrania=%d, błędy=%d, bajty=%d, znalezione=%d, nowe=%d, duplikaty=%d, "
+                        "czasy [s]: limit=%.3f, odpowiedź=%.3f, pobieranie=%.3f, parsowanie=%.3f, "
+                        "selektory=%.3f, dopasowanie=%.3f, zapis=%.3f", site, metrics.fetches, metrics.errors,
+                        metrics.bytes, metrics.found, metrics.new, metrics.duplicates, metrics.wait,
+                        metrics.response, metrics.download, metrics.parse, metrics.select, metrics.match,
+                        metrics.persist)
+
+
+def escape_label(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class MetricsRegistry:
+    """Metryki wszystkich cykli: sumy od startu programu i ostatni cykl, w formacie tekstowym Prometheusa."""
+
+    def __init__(self, metrics_file=None):
+        self.metrics_file = metrics_file
+        self.lock = threading.Lock()  # Czasy zapisu dopisuje wątek zapisu przetargów
+        self.totals = {}  # Strona -> SiteMetrics od startu programu
+        self.cycles = 0
+        self.last_cycle = None
+        self.limiter_stats = {}
+        # Przetargi zapisuje osobny wątek, już po zakończeniu cyklu - podsumowanie cyklu publikujemy wtedy
+        # dopiero po dopisaniu czasu zapisu (record_persist)
+        self.persist_tracked = False
+
+    def track_persist(self):
+        self.persist_tracked = True
+
+    def record_persist(self, cycle, seconds_by_site):
+        """Dopisuje czas zapisu przetargów (strona -> sekundy) do cyklu, z którego pochodzą (lub tylko do sum)."""
+        with self.lock:
+            for site, seconds in seconds_by_site.items():
+                self.totals.setdefault(site, SiteMetrics()).persist += seconds
+                if cycle is not None:
+                    cycle.site(site).persist += seconds
+            publish = cycle is not None and not cycle.persisted
+            if cycle is not None:
+                cycle.persisted = True
+        if publish:
+            self.publish(cycle)
+        elif self.metrics_file:
+            self.write(self.metrics_file)
+
+    def record_cycle(self, cycle, limiter_stats=None):
+        with self.lock:
+            for site, metrics in cycle.sites.items():
+                self.totals.setdefault(site, SiteMetrics()).add(metrics)
+            self.cycles += 1
+            self.last_cycle = cycle
+            self.limiter_stats = limiter_stats or {}
+        if not self.persist_tracked:
+            self.publish(cycle)
+
+    def publish(self, cycle):
+        cycle.log_summary()
+        if self.metrics_file:
+            self.write(self.metrics_file)
+
+    def cycle_record(self):
+        """Podsumowanie ostatniego cyklu (CycleMetrics.as_record) albo None przed pierwszym cyklem."""
+        with self.lock:
+            return self.last_cycle.as_record() if self.last_cycle is not None else None
+
+    def render(self):
+        """Metryki w formacie tekstowym Prometheusa (text exposition format 0.0.4)."""
+        lines = []
+        with self.lock:
+            totals = {site: metrics.as_dict() for site, metrics in self.totals.items()}
+            last_cycle = self.last_cycle
+            cycles = self.cycles
+            limiter_stats = dict(self.limiter_stats)
+
+        for name in COUNTERS:
+            metric = f"przetargi_{name}_total"
+            lines.append(f"# TYPE {metric} counter")
+            for site, values in sorted(totals.items()):
+                lines.append(f'{metric}{{site="{escape_label(site)}"}} {values[name]}')
+        lines.append("# TYPE przetargi_stage_seconds_total counter")
+        for site, values in sorted(totals.items()):
+            for stage in STAGES:
+                lines.append(f'przetargi_stage_seconds_total{{site="{escape_label(site)}",stage="{stage}"}} '
+                             f'{values[stage]:.6f}')
+
+        lines.append("# TYPE przetargi_cycles_total counter")
+        lines.append(f"przetargi_cycles_total {cycles}")
+        if last_cycle is not None:
+            lines.append("# TYPE przetargi_last_cycle_duration_seconds gauge")
+            lines.append(f"przetargi_last_cycle_duration_seconds {last_cycle.duration or 0.0:.6f}")
+            lines.append("# TYPE przetargi_last_cycle_timestamp_seconds gauge")
+            lines.append(f"przetargi_last_cycle_timestamp_seconds {last_cycle.started:.0f}")
+            lines.append("# TYPE przetargi_last_cycle_new gauge")
+            for site, metrics in sorted(last_cycle.sites.items()):
+                lines.append(f'przetargi_last_cycle_new{{site="{escape_label(site)}"}} {metrics.new}')
+
+        lines.append("# TYPE przetargi_rate_limit_wait_seconds_total counter")
+        for host, state in sorted(limiter_stats.items()):
+            lines.append(f'przetargi_rate_limit_wait_seconds_total{{host="{escape_label(host)}"}} '
+                         f'{state["waited"]:.6f}')
+        lines.append("# TYPE przetargi_throttled_total counter")
+        for host, state in sorted(limiter_stats.items()):
+            lines.append(f'przetargi_throttled_total{{host="{escape_label(host)}"}} {state["throttled"]}')
+        return "\n".join(lines) + "\n"
+
+    def write(self, path):
+        # Zapis przez plik tymczasowy, żeby np. node_exporter (textfile collector) nie odczytał połowy pliku
+        temp_path = path + ".tmp"
+        try:
+            with open(temp_path, "w", encoding="utf-8") as f:
+                f.write(self.render())
+            os.replace(temp_path, path)
+        except OSError as e:
+            logger.error("Błąd podczas zapisu metryk do pliku: %s\nSzczegóły: %s", path, e)
+
+    def serve(self, port, host="127.0.0.1"):
+        """Udostępnia metryki pod adresem http://host:port/metrics, a podsumowanie ostatniego cyklu (JSON)
+        pod /cycle, w wątku w tle; zwraca serwer."""
+        registry = self
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                path = self.path.rstrip("/")
+                if path == "/cycle":
+                    body = json.dumps(registry.cycle_record()).encode("utf-8")
+                    content_type = "application/json"
+                elif path in ("", "/metrics"):
+                    body = registry.render().encode("utf-8")
+                    content_type = "text/plain; version=0.0.4; charset=utf-8"
+                else:
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                logger.debug("Metryki: " + format, *args)
+
+        server = ThreadingHTTPServer((host, port), MetricsHandler)
+        threading.Thread(target=server.serve_forever, name="metrics", daemon=True).start()
+        logger.info("Metryki dostępne pod adresem http://%s:%d/metrics", host, port)
+        return server
+
+
+def create_registry(config, metrics_file=None, metrics_port=None):
+    """Rejestr metryk według konfiguracji (metrics_file, metrics_port); argumenty mają pierwszeństwo."""
+    registry = MetricsRegistry(metrics_file or config.get("metrics_file"))
+    port = metrics_port or config.get("metrics_port")
+    if port:
+        try:
+            registry.serve(int(port))
+        except OSError as e:
+            logger.error("Nie można uruchomić serwera metryk na porcie %s\nSzczegóły: %s", port, e)
+    return registry
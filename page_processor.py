@@ -0,0 +1,175 @@
+import hashlib
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+
+from html_parsing import compile_selector, parse_document, detect_encoding
+from keyword_matcher import KeywordMatcher
+from tender_fields import FieldRules
+
+# Reguły jednej strony z konfiguracji - same napisy i liczby, więc można je przekazać do innego procesu
+PageRules = namedtuple("PageRules", "parser selectors fields max_items next_page_selector")
+# Przetargi ze strony razem z dopasowanymi słowami kluczowymi (None, gdy brak dopasowania) i dane do statystyk;
+# błędy to pary (komunikat, argumenty) do zalogowania w wątku wyszukiwania
+PageResult = namedtuple("PageResult",
+                        "tenders next_href errors parses selectors parse_time select_time match_time")
+
+STREAM_CHUNK_SIZE = 16384  # Rozmiar fragmentów odpowiedzi przekazywanych do parsera strumieniowego
+
+
+def create_pool(workers):
+    """Pula procesów do parsowania stron albo None, gdy strony przetwarza wątek wyszukiwania."""
+    return ProcessPoolExecutor(max_workers=workers) if workers and workers > 0 else None
+
+
+@lru_cache(maxsize=256)
+def compile_rules(rules):
+    # W procesach roboczych selektory kompilujemy raz na proces, a nie dla każdej strony
+    selectors = [compile_selector(expression) for expression in rules.selectors]
+    next_selector = compile_selector(rules.next_page_selector) if rules.next_page_selector else None
+    return selectors, FieldRules(dict(rules.fields)), next_selector
+
+
+@lru_cache(maxsize=8)
+def keyword_matcher(keywords):
+    return KeywordMatcher(keywords)
+
+
+def extract_tenders(elements, page_url, site, field_rules, matcher, tenders, errors):
+    """Dopisuje przetargi z elementów znalezionych przez selektor; zwraca czas dopasowania słów kluczowych."""
+    match_time = 0.0
+    for element in elements:
+        # Tytuł, link i pozostałe pola odczytujemy z tego samego, już sparsowanego dokumentu
+        try:
+            tender = field_rules.extract(element, page_url, site)
+        except ValueError as e:
+            errors.append(("Błąd reguł pól na stronie: %s\nSzczegóły: %s", (page_url, str(e))))
+            break
+        # Jedno przejście po tytule zwraca wszystkie dopasowane słowa kluczowe
+        started = time.perf_counter()
+        matched_keywords = matcher.match(tender.title) if tender.link else None
+        match_time += time.perf_counter() - started
+        tenders.append((tender, ", ".join(matched_keywords) if matched_keywords else None))
+    return match_time
+
+
+def process_page(content, page_url, site, rules, keywords):
+    """Parsuje stronę wyników, odczytuje przetargi i dopasowuje słowa kluczowe; zwraca PageResult.
+
+    Funkcja nie korzysta ze stanu wątku wyszukiwania, więc może działać w puli procesów.
+    """
+    selectors, field_rules, next_selector = compile_rules(rules)
+    matcher = keyword_matcher(keywords)
+    document = parse_document(content, rules.parser)
+    tenders = []
+    errors = []
+    match_time = 0.0
+    started = time.perf_counter()
+    for selector in selectors:
+        try:
+            elements = selector.select(document, limit=rules.max_items)
+        except Exception as e:
+            errors.append(("Błąd selektora %s na stronie: %s\nSzczegóły: %s", (selector.expression, page_url, str(e))))
+            continue
+        match_time += extract_tenders(elements, page_url, site, field_rules, matcher, tenders, errors)
+
+    next_href = None
+    if next_selector is not None:
+        try:
+            links = next_selector.select(document, limit=1)
+            next_href = links[0].get('href') if links else None
+        except Exception as e:
+            errors.append(("Błąd selektora następnej strony na stronie: %s\nSzczegóły: %s", (page_url, str(e))))
+    select_time = time.perf_counter() - started - document.parse_time - match_time
+    return PageResult(tenders, next_href, errors, document.parses, len(selectors), document.parse_time,
+                      select_time, match_time)
+
+
+def is_complete(elements, closed, limit):
+    # Selektor znalazł limit elementów i wszystkie są już zamknięte (kompletne)
+    return len(elements) == limit and all(element.node in closed for element in elements)
+
+
+def stream_page(chunks, page_url, site, rules, keywords, encoding=None):
+    """Jak process_page, ale parsuje odpowiedź w trakcie pobierania parserem strumieniowym lxml.
+
+    Reguły muszą zawierać wyłącznie wyrażenia XPath. Gdy każdy selektor znalazł już max_items zamkniętych
+    elementów, dalsza część odpowiedzi nie jest czytana - chyba że potrzebny jest link do następnej strony.
+    Sprawdzenie przegląda całe dotychczasowe drzewo, więc wykonujemy je po podwojeniu liczby przeczytanych
+    bajtów: łączny koszt pozostaje liniowy także wtedy, gdy któryś selektor nigdy nie osiągnie limitu.
+    encoding to kodowanie z nagłówka odpowiedzi; bez niego ustalamy je z pierwszego fragmentu treści.
+    Zwraca (PageResult, liczba przeczytanych bajtów, skrót przeczytanej treści).
+    """
+    from lxml import etree
+
+    selectors, field_rules, next_selector = compile_rules(rules)
+    matcher = keyword_matcher(keywords)
+    stop_early = next_selector is None and rules.max_items > 0
+    digest = hashlib.blake2b(digest_size=16)
+    parser = None
+    root = None
+    closed = set()  # Elementy, których znacznik zamykający został już przeczytany
+    size = 0
+    next_check = 0  # Liczba bajtów, po której ponownie sprawdzamy, czy można przerwać czytanie
+    parse_time = select_time = 0.0
+    complete = False
+    for chunk in chunks:
+        if not chunk:
+            continue
+        size += len(chunk)
+        digest.update(chunk)
+        started = time.perf_counter()
+        if parser is None:
+            parser = etree.HTMLPullParser(events=("end",), encoding=encoding or detect_encoding(chunk, partial=True))
+        parser.feed(chunk)
+        for _, element in parser.read_events():
+            closed.add(element)
+            if root is None:
+                root = element.getroottree().getroot()
+        parse_time += time.perf_counter() - started
+        if stop_early and root is not None and size >= next_check:
+            next_check = size * 2
+            started = time.perf_counter()
+            try:
+                complete = all(is_complete(selector.select_tree(root, rules.max_items), closed, rules.max_items)
+                               for selector in selectors)
+            except Exception:
+                # Błąd selektora zgłosimy po przeczytaniu całej strony
+                stop_early = False
+            select_time += time.perf_counter() - started
+            if complete:
+                break
+    if parser is not None and not complete:
+        started = time.perf_counter()
+        final_root = parser.close()
+        if final_root is not None:
+            root = final_root
+        parse_time += time.perf_counter() - started
+
+    tenders = []
+    errors = []
+    match_time = 0.0
+    next_href = None
+    started = time.perf_counter()
+    if root is not None:
+        # Po zatrzymaniu pierwsze max_items elementów każdego selektora jest już kompletnych
+        for selector in selectors:
+            try:
+                elements = selector.select_tree(root, rules.max_items)
+            except Exception as e:
+                errors.append(("Błąd selektora %s na stronie: %s\nSzczegóły: %s",
+                               (selector.expression, page_url, str(e))))
+                continue
+            match_time += extract_tenders(elements, page_url, site, field_rules, matcher, tenders, errors)
+        if next_selector is not None:
+            try:
+                links = next_selector.select_tree(root, limit=1)
+                next_href = links[0].get('href') if links else None
+            except Exception as e:
+                errors.append(("Błąd selektora następnej strony na stronie: %s\nSzczegóły: %s", (page_url, str(e))))
+    select_time += time.perf_counter() - started - match_time
+    page = PageResult(tenders, next_href, errors, 1 if root is not None else 0, len(selectors), parse_time,
+                      select_time, match_time)
+    return page, size, digest.hexdigest()
+
@@ -0,0 +1,182 @@
+import email.utils
+import threading
+import time
+from urllib.parse import urlparse
+from urllib.robotparser import RobotFileParser
+
+import requests
+
+DEFAULT_REQUESTS_PER_SECOND = 1.0  # Domyślne tempo zapytań do jednego hosta
+DEFAULT_BURST = 2  # Liczba zapytań, które można wysłać od razu po dłuższej przerwie
+ROBOTS_REFRESH = 24 * 3600  # Co ile sekund odświeżamy robots.txt
+MAX_RETRY_AFTER = 3600  # Górna granica wstrzymania hosta po nagłówku Retry-After
+RATE_RECOVERY = 0.1  # Po spowolnieniu każda poprawna odpowiedź przywraca taką część ustawionego tempa
+
+
+class DisallowedByRobots(requests.exceptions.RequestException):
+    pass
+
+
+class HostThrottled(requests.exceptions.RequestException):
+    pass
+
+
+def parse_retry_after(value):
+    """Retry-After jako liczba sekund lub data HTTP; zwraca liczbę sekund albo None."""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        moment = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, moment.timestamp() - time.time())
+
+
+class TokenBucket:
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self, now):
+        """Pobiera żeton (także na kredyt) i zwraca, ile sekund trzeba odczekać przed zapytaniem."""
+        self.refill(now)
+        self.tokens -= 1
+        return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+
+
+class HostState:
+    def __init__(self, rate, burst):
+        self.lock = threading.Lock()
+        self.rate = rate  # Ustawione tempo hosta, do którego wracamy po spowolnieniu
+        self.bucket = TokenBucket(rate, burst)
+        self.robots = None
+        self.robots_checked = None  # Czas ostatniego pobrania robots.txt
+        self.crawl_delay = None
+        self.blocked_until = 0.0  # Wstrzymanie po Retry-After (czas monotoniczny)
+        self.requests = 0
+        self.waited = 0.0
+        self.throttled = 0  # Liczba odpowiedzi 429/503 z Retry-After
+
+
+class RateLimiter:
+    """Limit zapytań na host (token bucket) z obsługą robots.txt (Crawl-delay) i nagłówka Retry-After."""
+
+    def __init__(self, session, requests_per_second=DEFAULT_REQUESTS_PER_SECOND, burst=DEFAULT_BURST,
+                 respect_robots=True, timeout=10):
+        self.session = session
+        self.rate = max(0.01, float(requests_per_second))
+        self.burst = max(1, int(burst))
+        self.respect_robots = respect_robots
+        self.timeout = timeout
+        self.hosts = {}
+        self.lock = threading.Lock()
+
+    def user_agent(self):
+        return self.session.headers.get("User-Agent", "*")
+
+    def host_state(self, url):
+        parts = urlparse(url)
+        host = parts.netloc.lower()
+        with self.lock:
+            state = self.hosts.get(host)
+            if state is None:
+                state = self.hosts[host] = HostState(self.rate, self.burst)
+        if self.respect_robots and self.robots_stale(state):
+            with state.lock:
+                if self.robots_stale(state):
+                    self.load_robots(state, f"{parts.scheme}://{parts.netloc}/robots.txt")
+        return state
+
+    @staticmethod
+    def robots_stale(state):
+        return state.robots_checked is None or time.monotonic() - state.robots_checked > ROBOTS_REFRESH
+
+    def load_robots(self, state, robots_url):
+        try:
+            self.parse_robots(state, robots_url)
+        finally:
+            # Czas sprawdzenia ustawiamy na końcu, aby inne wątki czekały na wczytanie reguł
+            state.robots_checked = time.monotonic()
+
+    def parse_robots(self, state, robots_url):
+        try:
+            response = self.session.get(robots_url, timeout=self.timeout)
+        except requests.exceptions.RequestException:
+            return
+        if response.status_code != 200:
+            state.robots = None
+            return
+        robots = RobotFileParser(robots_url)
+        robots.parse(response.text.splitlines())
+        state.robots = robots
+        state.crawl_delay = robots.crawl_delay(self.user_agent()) or None
+        if state.crawl_delay:
+            # Crawl-delay zmniejsza tempo zapytań do tego hosta
+            state.rate = state.bucket.rate = min(self.rate, 1.0 / float(state.crawl_delay))
+            state.bucket.capacity = 1
+            state.bucket.tokens = min(state.bucket.tokens, 1)
+
+    def check_allowed(self, url):
+        state = self.host_state(url)
+        if state.robots is not None and not state.robots.can_fetch(self.user_agent(), url):
+            raise DisallowedByRobots(f"Adres zablokowany w robots.txt: {url}")
+
+    def reserve(self, url, max_delay=None):
+        """Rezerwuje zapytanie do hosta; zwraca, ile sekund trzeba odczekać przed jego wysłaniem.
+
+        Gdy host jest wstrzymany (Retry-After) dłużej niż max_delay sekund, zgłasza HostThrottled bez rezerwacji.
+        """
+        state = self.host_state(url)
+        with state.lock:
+            now = time.monotonic()
+            if max_delay is not None and state.blocked_until - now > max_delay:
+                raise HostThrottled(f"Host wstrzymany dłużej niż {max_delay:.0f} s, pomijam: {url}")
+            delay = max(0.0, state.bucket.reserve(now), state.blocked_until - now)
+            state.requests += 1
+            state.waited += delay
+        return delay
+
+    def note_response(self, url, response):
+        state = self.host_state(url)
+        if response.status_code not in (429, 503):
+            with state.lock:
+                # Po spowolnieniu wracamy do ustawionego tempa stopniowo (wzrost addytywny)
+                state.bucket.rate = min(state.rate, state.bucket.rate + state.rate * RATE_RECOVERY)
+            return
+        retry_after = parse_retry_after(response.headers.get("Retry-After"))
+        with state.lock:
+            state.throttled += 1
+            if retry_after is None:
+                # Bez Retry-After zwalniamy do połowy bieżącego tempa
+                state.bucket.rate = max(0.01, state.bucket.rate / 2)
+                return
+            state.blocked_until = max(state.blocked_until, time.monotonic() + min(retry_after, MAX_RETRY_AFTER))
+
+    def stats(self):
+        """Stan limitów dla każdego hosta (do logów i metryk)."""
+        now = time.monotonic()
+        with self.lock:
+            hosts = dict(self.hosts)
+        result = {}
+        for host, state in hosts.items():
+            with state.lock:
+                state.bucket.refill(now)
+                result[host] = {
+                    "rate": state.bucket.rate,
+                    "tokens": state.bucket.tokens,
+                    "crawl_delay": state.crawl_delay,
+                    "blocked_for": max(0.0, state.blocked_until - now),
+                    "requests": state.requests,
+                    "waited": state.waited,
+                    "throttled": state.throttled,
+                }
+        return result
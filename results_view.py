@@ -0,0 +1,139 @@
+import tkinter as tk
+from tkinter import ttk
+
+from tender_fields import parse_deadline
+from tender_store import MATCHED
+
+DEFAULT_RESULTS_LIMIT = 500  # Maksymalna liczba wierszy w widoku wyników
+
+# Kolumna widoku -> kolumna w bazie, według której sortujemy
+COLUMNS = (("Tytuł", "title"), ("Link", "link"), ("Słowo kluczowe", "keyword"), ("Termin", "deadline"),
+           ("Zamawiający", "buyer"))
+
+
+def format_deadline(deadline):
+    """Termin jako dd.mm.rrrr z daty (Tender) lub tekstu ISO (baza)."""
+    if not deadline:
+        return ""
+    if isinstance(deadline, str):
+        year, month, day = deadline[:10].split("-")
+        return f"{day}.{month}.{year}"
+    return deadline.strftime("%d.%m.%Y")
+
+
+class ResultsView(ttk.Frame):
+    """Przetargi spełniające kryteria: najwyżej `limit` wierszy, a wyszukiwanie i sortowanie wykonuje baza."""
+
+    def __init__(self, parent, store, limit=DEFAULT_RESULTS_LIMIT):
+        super().__init__(parent)
+        self.store = store
+        self.limit = max(1, int(limit))
+        self.search_text = ""
+        self.date_from = None  # Zakres terminów składania ofert
+        self.date_to = None
+        self.show_all = tk.BooleanVar(value=False)  # Także przetargi niespełniające kryteriów
+        self.order_by = "id"  # Domyślnie najnowsze przetargi na górze
+        self.descending = True
+        self.offset = 0
+        self.total = 0
+
+        search_frame = tk.Frame(self)
+        search_frame.pack(padx=10, pady=(10, 0), fill=tk.X)
+        tk.Label(search_frame, text="Szukaj w tytule lub zamawiającym").pack(side=tk.LEFT)
+        self.search_entry = tk.Entry(search_frame)
+        self.search_entry.pack(side=tk.LEFT, padx=5, fill=tk.X, expand=True)
+        self.search_entry.bind("<Return>", lambda event: self.search())
+        tk.Label(search_frame, text="Termin od").pack(side=tk.LEFT)
+        self.date_from_entry = tk.Entry(search_frame, width=11)
+        self.date_from_entry.pack(side=tk.LEFT, padx=5)
+        self.date_from_entry.bind("<Return>", lambda event: self.search())
+        tk.Label(search_frame, text="do").pack(side=tk.LEFT)
+        self.date_to_entry = tk.Entry(search_frame, width=11)
+        self.date_to_entry.pack(side=tk.LEFT, padx=5)
+        self.date_to_entry.bind("<Return>", lambda event: self.search())
+        tk.Checkbutton(search_frame, text="Wszystkie przetargi", variable=self.show_all,
+                       command=self.search).pack(side=tk.LEFT)
+        tk.Button(search_frame, text="Szukaj", command=self.search).pack(side=tk.LEFT)
+        tk.Button(search_frame, text="Wyczyść", command=self.clear_search).pack(side=tk.LEFT, padx=(5, 0))
+
+        self.tree = ttk.Treeview(self, columns=[name for name, _ in COLUMNS], show="headings")
+        for name, column in COLUMNS:
+            self.tree.heading(name, text=name, command=lambda column=column: self.sort_by(column))
+        self.tree.pack(padx=10, pady=10, fill=tk.BOTH, expand=True)
+
+        paging_frame = tk.Frame(self)
+        paging_frame.pack(padx=10, fill=tk.X)
+        tk.Button(paging_frame, text="Poprzednie", command=self.previous_page).pack(side=tk.LEFT)
+        tk.Button(paging_frame, text="Następne", command=self.next_page).pack(side=tk.LEFT, padx=5)
+        self.status_label = tk.Label(paging_frame, text="")
+        self.status_label.pack(side=tk.LEFT, padx=5)
+
+    def is_live(self):
+        # Nowe przetargi dopisujemy bezpośrednio tylko na pierwszej stronie domyślnego widoku
+        return (not self.search_text and not self.date_from and not self.date_to and not self.show_all.get()
+                and self.order_by == "id" and self.descending and self.offset == 0)
+
+    def refresh(self):
+        matched = None if self.show_all.get() else MATCHED
+        rows, self.total = self.store.query(matched, self.search_text, self.order_by, self.descending,
+                                            self.limit, self.offset, self.date_from, self.date_to)
+        self.tree.delete(*self.tree.get_children())
+        for title, link, keyword, deadline, buyer in rows:
+            self.tree.insert("", "end", values=(title, link, keyword or "", format_deadline(deadline), buyer or ""))
+        self.update_status()
+
+    def add_tenders(self, tenders):
+        """Dodaje partię nowych przetargów jednym odświeżeniem widoku."""
+        if not tenders:
+            return
+        if not self.is_live():
+            self.refresh()
+            return
+        for tender in tenders:
+            self.tree.insert("", 0, values=(tender.title, tender.link, tender.keyword or "",
+                                            format_deadline(tender.deadline), tender.buyer or ""))
+        # Najstarsze wiersze wypadają z widoku, ale zostają w bazie
+        children = self.tree.get_children()
+        if len(children) > self.limit:
+            self.tree.delete(*children[self.limit:])
+        self.total += len(tenders)
+        self.update_status()
+
+    def update_status(self):
+        shown = len(self.tree.get_children())
+        first = self.offset + 1 if shown else 0
+        self.status_label.config(text=f"Wyświetlono {first}-{self.offset + shown} z {self.total}")
+
+    def search(self):
+        self.search_text = self.search_entry.get().strip()
+        # Daty w formacie dd.mm.rrrr lub rrrr-mm-dd; nieczytelna data nie ogranicza wyników
+        self.date_from = parse_deadline(self.date_from_entry.get().strip())
+        self.date_to = parse_deadline(self.date_to_entry.get().strip())
+        self.offset = 0
+        self.refresh()
+
+    def clear_search(self):
+        self.search_entry.delete(0, tk.END)
+        self.date_from_entry.delete(0, tk.END)
+        self.date_to_entry.delete(0, tk.END)
+        self.show_all.set(False)
+        self.search()
+
+    def sort_by(self, column):
+        if self.order_by == column:
+            self.descending = not self.descending
+        else:
+            self.order_by = column
+            self.descending = False
+        self.offset = 0
+        self.refresh()
+
+    def next_page(self):
+        if self.offset + self.limit < self.total:
+            self.offset += self.limit
+            self.refresh()
+
+    def previous_page(self):
+        if self.offset:
+            self.offset = max(0, self.offset - self.limit)
+            self.refresh()
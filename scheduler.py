@@ -0,0 +1,69 @@
+import heapq
+import time
+
+SPEEDUP = 0.5  # Mnożnik interwału po cyklu z nowymi przetargami
+SLOWDOWN = 1.25  # Mnożnik interwału po cyklu bez nowych przetargów
+DEFAULT_MIN_FACTOR = 0.25  # Domyślne granice interwału względem loop_time
+DEFAULT_MAX_FACTOR = 4.0
+GROUPING_WINDOW = 1.0  # Strony, których termin przypada w ciągu tylu sekund, sprawdzamy w jednym cyklu
+
+
+class SiteScheduler:
+    """Kolejka priorytetowa terminów sprawdzenia stron z interwałami dopasowywanymi do liczby nowych przetargów.
+
+    Suma częstotliwości sprawdzeń wszystkich stron jest utrzymywana na poziomie len(sites) / base_interval,
+    więc łączna liczba zapytań nie rośnie - przesuwamy je tylko na strony, na których pojawiają się przetargi.
+    """
+
+    def __init__(self, sites, base_interval, site_options=None, min_interval=None, max_interval=None):
+        site_options = site_options or {}
+        self.base_interval = max(1.0, float(base_interval))
+        self.bounds = {}
+        self.intervals = {}
+        self.heap = []
+        now = time.monotonic()
+        for order, site in enumerate(sites):
+            options = site_options.get(site, {})
+            low = float(options.get("min_interval", min_interval or self.base_interval * DEFAULT_MIN_FACTOR))
+            high = float(options.get("max_interval", max_interval or self.base_interval * DEFAULT_MAX_FACTOR))
+            self.bounds[site] = (low, max(low, high))
+            self.intervals[site] = self.clamp(site, self.base_interval)
+            heapq.heappush(self.heap, (now, order, site))  # Pierwsze sprawdzenie od razu
+        self.order = {site: order for order, site in enumerate(sites)}
+
+    def clamp(self, site, interval):
+        low, high = self.bounds[site]
+        return min(high, max(low, interval))
+
+    def pop_due(self, now=None):
+        """Zdejmuje z kolejki wszystkie strony, których termin już minął (lub zaraz minie)."""
+        now = time.monotonic() if now is None else now
+        due = []
+        while self.heap and self.heap[0][0] <= now + GROUPING_WINDOW:
+            due.append(heapq.heappop(self.heap)[2])
+        return due
+
+    def seconds_until_next(self, now=None):
+        if not self.heap:
+            return self.base_interval
+        now = time.monotonic() if now is None else now
+        return max(0.0, self.heap[0][0] - now)
+
+    def record(self, site, new_count, now=None):
+        """Zapisuje wynik sprawdzenia strony (None przy błędzie) i planuje kolejne sprawdzenie."""
+        now = time.monotonic() if now is None else now
+        if new_count is not None:
+            factor = SPEEDUP if new_count > 0 else SLOWDOWN
+            self.intervals[site] = self.clamp(site, self.intervals[site] * factor)
+            self.rebalance()
+        heapq.heappush(self.heap, (now + self.intervals[site], self.order[site], site))
+
+    def rebalance(self):
+        # Skalujemy wszystkie interwały tak, aby łączna liczba zapytań na sekundę pozostała stała
+        if len(self.intervals) < 2:
+            return
+        target_rate = len(self.intervals) / self.base_interval
+        rate = sum(1.0 / interval for interval in self.intervals.values())
+        factor = rate / target_rate
+        for site, interval in self.intervals.items():
+            self.intervals[site] = self.clamp(site, interval * factor)
@@ -0,0 +1,397 @@
+import logging
+import threading
+import time
+from concurrent.futures import wait, FIRST_COMPLETED
+from urllib.parse import urljoin
+
+from fetcher import (ConcurrentFetcher, ValidatorCache, create_session, DEFAULT_MAX_CONCURRENCY,
+                     DEFAULT_MAX_PER_HOST, DEFAULT_POOL_CONNECTIONS, DEFAULT_RETRIES, DEFAULT_BACKOFF_FACTOR)
+from metrics import CycleMetrics, MetricsRegistry
+from politeness import RateLimiter, DEFAULT_REQUESTS_PER_SECOND, DEFAULT_BURST
+from page_processor import PageRules, create_pool, process_page, stream_page, STREAM_CHUNK_SIZE
+from scheduler import SiteScheduler
+from tender_fields import FieldRules
+from html_parsing import backend_available, compile_selector, header_encoding, to_xpath, DEFAULT_PARSER
+
+DEFAULT_MAX_PAGES = 5  # Maksymalna liczba stron wyników przeglądanych w jednym cyklu
+DEFAULT_MAX_ITEMS = 20  # Maksymalna liczba przetargów z jednego selektora na jednej stronie wyników
+
+logger = logging.getLogger(__name__)
+
+
+class SearchWorker(threading.Thread):
+    def __init__(self, sites, selectors, keywords, result_callback, interval, all_results_callback,
+                 unfiltered_callback, progress_callback=None, config=None, cycle_callback=None,
+                 seen_callback=None, metrics=None):
+        super().__init__()
+        config = config or {}
+        self.sites = sites
+        self.selectors = selectors
+        self.keywords = keywords
+        self.result_callback = result_callback
+        self.interval = interval
+        self.all_results_callback = all_results_callback  # Callback do zapisywania wszystkich przetargów
+        self.unfiltered_callback = unfiltered_callback  # Callback do zapisywania niespełniających kryteriów
+        self.stop_event = threading.Event()
+        self.progress_callback = progress_callback  # Postęp oczekiwania na kolejny cykl (0-100)
+        self.cycle_callback = cycle_callback  # Wywoływany po zakończeniu każdego cyklu
+        self.seen_callback = seen_callback  # Sprawdza, czy przetarg był już zapisany (np. w indeksie duplikatów)
+        # Czasy etapów i liczniki dla każdej strony, podsumowywane po każdym cyklu
+        self.metrics = metrics if metrics is not None else MetricsRegistry(config.get("metrics_file"))
+        # Żądania warunkowe (ETag/Last-Modified) i skrót treści pozwalają pominąć niezmienione strony
+        validators = ValidatorCache() if config.get("conditional_requests", True) else None
+        max_per_host = config.get("max_per_host", DEFAULT_MAX_PER_HOST)
+        # Wspólna sesja HTTP wątku wyszukiwania: pula połączeń, kompresja i ponowienia
+        self.session = create_session(config.get("pool_connections", DEFAULT_POOL_CONNECTIONS),
+                                      config.get("pool_maxsize", max_per_host),
+                                      config.get("retries", DEFAULT_RETRIES),
+                                      config.get("backoff_factor", DEFAULT_BACKOFF_FACTOR))
+        # Limit tempa zapytań do każdego hosta, z uwzględnieniem robots.txt i nagłówka Retry-After
+        self.limiter = RateLimiter(self.session, config.get("requests_per_second", DEFAULT_REQUESTS_PER_SECOND),
+                                   config.get("burst", DEFAULT_BURST), config.get("respect_robots", True))
+        # Równoległe pobieranie stron z limitem globalnym i limitem na host
+        self.fetcher = ConcurrentFetcher(config.get("max_concurrency", DEFAULT_MAX_CONCURRENCY), max_per_host,
+                                         validators=validators, session=self.session, limiter=self.limiter)
+        # Silnik parsowania HTML: globalny lub ustawiony dla konkretnej strony
+        self.default_parser = self.resolve_parser(config.get("parser", DEFAULT_PARSER))
+        self.site_parsers = {site_data["url"]: self.resolve_parser(site_data["parser"])
+                             for site_data in config.get("urls", []) if site_data.get("parser")}
+        # Selektory (CSS lub XPath) kompilujemy raz przy starcie i używamy w kolejnych cyklach
+        self.compiled_selectors = {site: self.compile_selectors(selector_list)
+                                   for site, selector_list in zip(self.sites, self.selectors)}
+        # Stronicowanie: selektor linku do następnej strony lub szablon adresu, np. "...&page={page}"
+        self.site_options = {site_data["url"]: site_data for site_data in config.get("urls", [])}
+        # Pola przetargu (termin, zamawiający, wartość, region) odczytywane z elementu znalezionego przez selektor
+        self.field_rules = {site: self.compile_field_rules(site) for site in self.sites}
+        self.fetcher.fingerprints = {site: "\n".join([selector.expression for selector in compiled]
+                                                     + [self.field_rules[site].fingerprint()])
+                                     for site, compiled in self.compiled_selectors.items()}
+        self.default_max_pages = config.get("max_pages", DEFAULT_MAX_PAGES)
+        self.default_max_items = config.get("max_items", DEFAULT_MAX_ITEMS)
+        # Harmonogram sprawdzeń: osobny, dopasowywany interwał dla każdej strony
+        self.scheduler = SiteScheduler(self.sites, interval, self.site_options,
+                                       config.get("min_interval"), config.get("max_interval"))
+        # Host wstrzymany dłużej niż podstawowy interwał pomijamy w bieżącym cyklu zamiast na niego czekać
+        self.fetcher.max_wait = self.scheduler.base_interval
+        self.next_page_selectors = {}
+        for site in self.sites:
+            expression = self.site_options.get(site, {}).get("next_page_selector")
+            if expression:
+                try:
+                    self.next_page_selectors[site] = compile_selector(expression)
+                except ValueError as e:
+                    logger.warning("Pominięto selektor następnej strony: %s", e)
+        # Reguły stron w postaci, którą można przekazać do procesów roboczych
+        self.page_rules = {site: self.build_page_rules(site) for site in self.sites}
+        # Opcjonalna pula procesów: parsowanie i dopasowanie słów kluczowych na wielu rdzeniach
+        self.pool = create_pool(config.get("process_workers", 0))
+        # Strony przetwarzane strumieniowo w trakcie pobierania (lxml, selektory XPath)
+        self.stream_rules = {}
+        for site in self.sites:
+            if self.site_options.get(site, {}).get("streaming", config.get("streaming", False)):
+                rules = self.build_stream_rules(site)
+                if rules is None:
+                    logger.warning("Strona %s: przetwarzanie strumieniowe wymaga lxml oraz selektorów XPath "
+                                   "(lub pakietu cssselect dla selektorów CSS) - pobieram całą stronę.", site)
+                else:
+                    self.stream_rules[site] = rules
+        self.fetcher.stream_handlers = {site: self.process_stream for site in self.stream_rules}
+
+    def compile_selectors(self, selector_list):
+        compiled = []
+        for expression in selector_list:
+            if not expression.strip():
+                continue
+            try:
+                compiled.append(compile_selector(expression))
+            except ValueError as e:
+                logger.warning("Pominięto selektor: %s", e)
+        return compiled
+
+    def build_page_rules(self, site):
+        options = self.site_options.get(site, {})
+        next_selector = self.next_page_selectors.get(site)
+        # Link do następnej strony nie jest potrzebny przy szablonie adresu lub jednej stronie wyników
+        if options.get("page_url_template") or options.get("max_pages", self.default_max_pages) <= 1:
+            next_selector = None
+        return PageRules(self.site_parsers.get(site, self.default_parser),
+                         tuple(selector.expression for selector in self.compiled_selectors[site]),
+                         tuple(sorted((name, selector.expression)
+                                      for name, selector in self.field_rules[site].selectors.items())),
+                         options.get("max_items", self.default_max_items),
+                         next_selector.expression if next_selector is not None else None)
+
+    def build_stream_rules(self, site):
+        """Reguły strony z samymi wyrażeniami XPath; None, gdy któregoś selektora nie da się przetłumaczyć."""
+        if not backend_available("lxml"):
+            return None
+        rules = self.page_rules[site]
+        selectors = tuple(to_xpath(expression) for expression in rules.selectors)
+        fields = tuple((name, to_xpath(expression)) for name, expression in rules.fields)
+        next_page_selector = to_xpath(rules.next_page_selector) if rules.next_page_selector else None
+        if (None in selectors or any(expression is None for _, expression in fields)
+                or (rules.next_page_selector and next_page_selector is None)):
+            return None
+        return rules._replace(parser="lxml", selectors=selectors, fields=fields,
+                              next_page_selector=next_page_selector)
+
+    def compile_field_rules(self, site):
+        try:
+            return FieldRules(self.site_options.get(site, {}).get("fields"))
+        except ValueError as e:
+            logger.warning("Pominięto reguły pól dla strony %s: %s", site, e)
+            return FieldRules()
+
+    def resolve_parser(self, backend):
+        if backend_available(backend):
+            return backend
+        logger.warning("Silnik parsowania '%s' jest niedostępny, używam '%s'.", backend, DEFAULT_PARSER)
+        return DEFAULT_PARSER
+
+    def run(self):
+        total_steps = 100  # Pasek postępu ma 100 kroków
+
+        try:
+            while not self.stop_event.is_set():
+                due_sites = self.scheduler.pop_due()
+                if due_sites:
+                    new_by_site = self.perform_search(due_sites)
+                    for site in due_sites:
+                        self.scheduler.record(site, new_by_site.get(site))
+                    if self.cycle_callback is not None:
+                        self.cycle_callback()
+
+                # Czekamy do terminu najbliższej strony w harmonogramie
+                wait_time = self.scheduler.seconds_until_next()
+                step_duration = wait_time / total_steps  # Czas trwania jednego kroku
+                self.report_progress(0)
+                logger.info("Przerwa %.0f sekund przed kolejnym wyszukiwaniem...", wait_time)
+
+                for i in range(total_steps):
+                    # Czekamy odpowiednią liczbę sekund, przerywając od razu po zatrzymaniu
+                    if self.stop_event.wait(step_duration):
+                        return
+                    self.report_progress(i + 1)
+        finally:
+            self.close()
+
+    def run_once(self):
+        """Jeden cykl wyszukiwania w bieżącym wątku (np. uruchomienie z crona)."""
+        try:
+            self.perform_search()
+            if self.cycle_callback is not None:
+                self.cycle_callback()
+        finally:
+            self.close()
+
+    def close(self):
+        self.fetcher.close()
+        self.session.close()
+        if self.pool is not None:
+            self.pool.shutdown(cancel_futures=True)
+
+    def report_progress(self, value):
+        if self.progress_callback is not None:
+            self.progress_callback(value)
+
+    def perform_search(self, sites=None):
+        """Przeszukuje podane strony (domyślnie wszystkie) i zwraca liczbę nowych przetargów dla każdej z nich."""
+        sites = self.sites if sites is None else sites
+        logger.info("Rozpoczynam przeszukiwanie stron: %s", sites)
+        # Liczniki pobrań i parsowań w bieżącym cyklu
+        self.cycle_stats = {"fetches": 0, "parses": 0, "selectors": 0, "unchanged": 0, "next_pages": 0}
+        cycle_start = time.monotonic()
+        self.cycle_metrics = CycleMetrics()
+        # Dopasowanie słów kluczowych jest budowane raz dla danej krotki słów (także w procesach roboczych)
+        self.cycle_keywords = tuple(self.keywords)
+        visited = set()
+        new_by_site = {}
+
+        # Strony pobierane są równolegle, a wyniki przetwarzamy w kolejności ukończenia: w tym wątku
+        # lub w puli procesów, a wtedy wątek tylko zapisuje gotowe przetargi
+        batch = self.fetcher.batch(self.stop_event)
+        for site in sites:
+            visited.add(site)
+            batch.add(site)
+
+        pending = {}  # Przetwarzanie w puli procesów -> FetchResult
+        while True:
+            for result in batch:
+                page = self.process_result(result, pending, new_by_site)
+                if page is not None:
+                    self.handle_page(result, page, batch, visited, new_by_site)
+                self.handle_processed(pending, batch, visited, new_by_site, timeout=0)
+            if not pending or self.stop_event.is_set():
+                break
+            # Wszystkie pobrane strony czekają na pulę procesów; gotowe mogą dodać kolejne strony wyników
+            self.handle_processed(pending, batch, visited, new_by_site)
+        for future in pending:
+            future.cancel()
+
+        if self.fetcher.validators is not None:
+            self.fetcher.validators.save()
+        logger.info("Statystyki cyklu: pobrania=%d, bez zmian=%d, kolejne strony=%d, parsowania=%d, selektory=%d, "
+                    "czas=%.2f s", self.cycle_stats["fetches"], self.cycle_stats["unchanged"],
+                    self.cycle_stats["next_pages"], self.cycle_stats["parses"], self.cycle_stats["selectors"],
+                    time.monotonic() - cycle_start)
+        self.log_limiter_stats()
+        self.cycle_metrics.finish(time.monotonic() - cycle_start)
+        self.metrics.record_cycle(self.cycle_metrics, self.limiter.stats())
+        return new_by_site
+
+    def log_limiter_stats(self):
+        if not logger.isEnabledFor(logging.INFO):
+            return
+        for host, state in self.limiter.stats().items():
+            message = (f"Limit hosta {host}: {state['rate']:.2f} zapytań/s, żetony={state['tokens']:.1f}, "
+                       f"zapytania={state['requests']}, oczekiwanie={state['waited']:.1f} s, "
+                       f"odmowy (429/503)={state['throttled']}")
+            if state["crawl_delay"]:
+                message += f", Crawl-delay={state['crawl_delay']} s"
+            if state["blocked_for"]:
+                message += f", wstrzymany jeszcze {state['blocked_for']:.0f} s"
+            logger.info(message)
+
+    def process_result(self, result, pending, new_by_site):
+        """Zwraca PageResult pobranej strony, None, gdy nie ma czego przetwarzać lub strona trafiła do puli."""
+        site = result.site
+        site_metrics = self.cycle_metrics.site(site)
+        logger.debug("Przeszukuję stronę: %s", result.url)
+        if result.error is not None:
+            site_metrics.errors += 1
+            logger.error("Błąd podczas pobierania strony: %s\nSzczegóły: %s", result.url, result.error)
+            return None
+        self.cycle_stats["fetches"] += 1
+        # Czas do otrzymania nagłówków (połączenie i odpowiedź serwera) oraz pobieranie treści
+        response_time = min(result.response.elapsed.total_seconds(), result.duration)
+        site_metrics.fetches += 1
+        site_metrics.bytes += result.size
+        site_metrics.wait += result.wait
+        site_metrics.response += response_time
+        site_metrics.download += result.duration - response_time
+        logger.debug("Otrzymano odpowiedź od strony: %s - Status kodu: %s", result.url, result.response.status_code)
+        if result.response.status_code not in (200, 304):
+            # Strona błędu (np. 404, 429, 503) nie jest listą przetargów; harmonogram dostaje None
+            site_metrics.errors += 1
+            logger.error("Błąd podczas pobierania strony: %s\nSzczegóły: status HTTP %s", result.url,
+                         result.response.status_code)
+            return None
+        if result.unchanged:
+            # Strona bez zmian od poprzedniego cyklu - nie ma w niej nowych przetargów
+            self.cycle_stats["unchanged"] += 1
+            site_metrics.unchanged += 1
+            logger.debug("Strona bez zmian, pomijam przetwarzanie: %s", result.url)
+            new_by_site.setdefault(site, 0)
+            self.commit_validator(result)
+            return None
+
+        if result.processed is not None:
+            # Strona przetworzona już w trakcie pobierania
+            return result.processed
+        arguments = (result.response.content, result.url, site, self.page_rules[site], self.cycle_keywords)
+        if self.pool is None:
+            try:
+                return process_page(*arguments)
+            except Exception as e:
+                # Tak jak w puli procesów: błąd jednej strony nie może zatrzymać wątku wyszukiwania
+                site_metrics.errors += 1
+                logger.error("Błąd podczas przetwarzania strony: %s\nSzczegóły: %s", result.url, e)
+                return None
+        pending[self.pool.submit(process_page, *arguments)] = result
+        return None
+
+    def process_stream(self, response, url, site):
+        # Wywoływane w wątku pobierającym dla stron czytanych strumieniowo
+        page, size, content_hash = stream_page(response.iter_content(STREAM_CHUNK_SIZE), url, site,
+                                               self.stream_rules[site], self.cycle_keywords,
+                                               header_encoding(response.headers.get("Content-Type")))
+        return page, size, content_hash, page.parse_time + page.select_time + page.match_time
+
+    def handle_processed(self, pending, batch, visited, new_by_site, timeout=None):
+        # Zapisuje przetargi ze stron przetworzonych już w puli procesów
+        if not pending:
+            return
+        done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+        for future in done:
+            result = pending.pop(future)
+            try:
+                page = future.result()
+            except Exception as e:
+                self.cycle_metrics.site(result.site).errors += 1
+                logger.error("Błąd podczas przetwarzania strony: %s\nSzczegóły: %s", result.url, e)
+                continue
+            self.handle_page(result, page, batch, visited, new_by_site)
+
+    def handle_page(self, result, page, batch, visited, new_by_site):
+        """Przekazuje przetargi ze strony do zapisu i w razie potrzeby dodaje kolejną stronę wyników."""
+        site = result.site
+        site_metrics = self.cycle_metrics.site(site)
+        self.cycle_stats["parses"] += page.parses
+        self.cycle_stats["selectors"] += page.selectors
+        site_metrics.errors += len(page.errors)
+        site_metrics.parse += page.parse_time
+        site_metrics.select += page.select_time
+        site_metrics.match += page.match_time
+        for message, arguments in page.errors:
+            logger.error(message, *arguments)
+        logger.debug("Znaleziono %d przetargów na stronie: %s", len(page.tenders), result.url)
+
+        new_count = self.dispatch_tenders(site_metrics, page.tenders)
+        new_by_site[site] = new_by_site.get(site, 0) + new_count
+
+        # Kolejną stronę wyników pobieramy tylko, gdy na bieżącej pojawiły się nowe przetargi
+        next_url = self.next_page_url(site, result.page, page.next_href, result.url) if new_count else None
+        if next_url and next_url not in visited:
+            visited.add(next_url)
+            self.cycle_stats["next_pages"] += 1
+            logger.debug("Nowe przetargi na stronie %s, pobieram kolejną: %s", result.page, next_url)
+            batch.add(next_url, site, result.page + 1)
+        self.commit_validator(result)
+
+    def commit_validator(self, result):
+        # Dopiero teraz strona może być w następnym cyklu uznana za niezmienioną
+        if self.fetcher.validators is not None and result.validator is not None:
+            self.fetcher.validators.commit(result.url, result.validator)
+
+    def next_page_url(self, site, page, next_href, page_url):
+        options = self.site_options.get(site, {})
+        if page >= options.get("max_pages", self.default_max_pages):
+            return None
+        template = options.get("page_url_template")
+        if template:
+            return template.format(page=page + 1)
+        return urljoin(page_url, next_href) if next_href else None
+
+    def dispatch_tenders(self, site_metrics, tenders):
+        """Przekazuje przetargi do callbacków i zwraca liczbę tych, których wcześniej nie widziano."""
+        debug = logger.isEnabledFor(logging.DEBUG)  # Komunikaty dla każdego przetargu tylko w trybie DEBUG
+        new_count = 0
+        for tender, keyword in tenders:
+            title, link = tender.title, tender.link
+            if not link:
+                logger.debug("Pominięto przetarg bez linku: %s", title)
+                continue
+            site_metrics.found += 1
+            if self.seen_callback is None or not self.seen_callback(tender):
+                new_count += 1
+                site_metrics.new += 1
+            else:
+                site_metrics.duplicates += 1
+
+            if debug:
+                logger.debug("Zapisuję wszystkie przetargi: Tytuł: %s, Link: %s", title, link)
+            self.all_results_callback(tender)
+
+            if keyword:
+                if debug:
+                    logger.debug("Znaleziono dopasowanie słów kluczowych '%s' w tytule: %s", keyword, title)
+                self.result_callback(tender.with_keyword(keyword))
+            else:
+                if debug:
+                    logger.debug("Brak dopasowania dla tytułu: %s", title)
+                self.unfiltered_callback(tender)
+        return new_count
+
+    def stop(self):
+        logger.info("Zatrzymywanie wyszukiwania...")
+        self.stop_event.set()
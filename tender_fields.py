@@ -0,0 +1,107 @@
+import re
+from datetime import date
+from urllib.parse import urljoin
+
+from html_parsing import compile_selector, LxmlElement
+from tender_record import Tender
+
+FIELD_NAMES = ("title", "link", "deadline", "buyer", "value", "region")  # Klucze w "fields" wpisu strony
+
+DATE_PATTERNS = (
+    re.compile(r"(?P<day>\d{1,2})[./-](?P<month>\d{1,2})[./-](?P<year>\d{4})"),
+    re.compile(r"(?P<year>\d{4})-(?P<month>\d{1,2})-(?P<day>\d{1,2})"),
+)
+NUMBER_PATTERN = re.compile(r"\d[\d\s .,]*")
+
+
+def parse_deadline(text):
+    """Data z tekstu w formacie dd.mm.rrrr lub rrrr-mm-dd; None, gdy jej nie ma."""
+    if not text:
+        return None
+    for pattern in DATE_PATTERNS:
+        found = pattern.search(text)
+        if found:
+            try:
+                return date(int(found["year"]), int(found["month"]), int(found["day"]))
+            except ValueError:
+                return None
+    return None
+
+
+def parse_value(text):
+    """Kwota z tekstu, np. "1 196 000,00 zł" -> 1196000.0; None, gdy nie ma w nim liczby."""
+    if not text:
+        return None
+    found = NUMBER_PATTERN.search(text)
+    if not found:
+        return None
+    number = re.sub(r"[\s ]", "", found.group()).rstrip(".,")
+    separators = [position for position, char in enumerate(number) if char in ".,"]
+    if separators:
+        last = separators[-1]
+        # Ostatni separator z najwyżej dwiema cyframi po nim oddziela część dziesiętną
+        if len(number) - last - 1 <= 2 and (len(separators) == 1 or number[last] != number[separators[-2]]):
+            number = number[:last].replace(".", "").replace(",", "") + "." + number[last + 1:]
+        else:
+            number = number.replace(".", "").replace(",", "")
+    try:
+        return float(number)
+    except ValueError:
+        return None
+
+
+def clean_text(element):
+    if element is None:
+        return None
+    text = " ".join(element.get_text().split())
+    return text or None
+
+
+class FieldRules:
+    """Selektory pól przetargu liczone względem elementu znalezionego przez selektor strony (np. wiersza tabeli).
+
+    Bez reguł element jest linkiem przetargu: tytuł to jego tekst, a link to atrybut href.
+    """
+
+    def __init__(self, fields=None):
+        self.selectors = {}
+        for name, expression in (fields or {}).items():
+            if name not in FIELD_NAMES:
+                raise ValueError(f"Nieznane pole przetargu: {name}")
+            if expression and expression.strip():
+                self.selectors[name] = compile_selector(expression)
+
+    def fingerprint(self):
+        return "\n".join(f"{name}={selector.expression}" for name, selector in sorted(self.selectors.items()))
+
+    def first(self, element, name):
+        selector = self.selectors.get(name)
+        return selector.select_in(element) if selector is not None else None
+
+    def find_link(self, element, title_element):
+        for candidate in (self.first(element, "link"), title_element, element):
+            if candidate is not None and candidate.get('href'):
+                return candidate.get('href')
+        # Pierwszy link w wierszu
+        fallback = compile_selector(".//a[@href]" if isinstance(element, LxmlElement) else "a[href]")
+        anchor = fallback.select_in(element)
+        return anchor.get('href') if anchor is not None else None
+
+    def extract(self, element, page_url, site=None):
+        """Zwraca Tender z pól elementu; link jest None, jeśli w elemencie nie ma linku."""
+        title_element = self.first(element, "title")
+        if title_element is not None:
+            title = clean_text(title_element) or ""
+        else:
+            title = element.get_text(strip=True)
+        href = self.find_link(element, title_element)
+        value_text = clean_text(self.first(element, "value"))
+        return Tender(
+            title,
+            urljoin(page_url, href) if href else None,
+            parse_deadline(clean_text(self.first(element, "deadline"))),
+            clean_text(self.first(element, "buyer")),
+            parse_value(value_text),
+            clean_text(self.first(element, "region")),
+            site,
+        )
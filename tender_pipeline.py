@@ -0,0 +1,281 @@
+import logging
+import functools
+import os
+import sqlite3
+import threading
+import time
+from queue import Queue
+
+from keyword_matcher import KeywordMatcher
+from tender_store import TenderStore, MATCHED, UNMATCHED
+from excel_writer import ExcelExportWriter, DEFAULT_FLUSH_ROWS, DEFAULT_FLUSH_SECONDS
+from dedup_index import DedupIndex, DEFAULT_RETENTION_DAYS, ALL, FILTERED, UNFILTERED
+
+EXCEL_FILE = os.path.join(os.getcwd(), "wszystkie_przetargi.xlsx")  # Plik do przechowywania wszystkich przetargów
+FILTERED_FILE = os.path.join(os.getcwd(), "filtered_przetargi.xlsx")  # Przetargi spełniające kryteria
+UNFILTERED_FILE = os.path.join(os.getcwd(), "unfiltered_przetargi.xlsx")  # Przetargi niespełniające kryteriów
+# Pliki Excel i klasyfikacja przetargów, które zawierają
+EXPORTS = ((EXCEL_FILE, None), (FILTERED_FILE, MATCHED), (UNFILTERED_FILE, UNMATCHED))
+
+logger = logging.getLogger(__name__)
+
+
+class TenderPipeline:
+    """Zapis przetargów z wątku wyszukiwania: indeks duplikatów, baza i eksport do Excela (wspólny dla GUI i CLI)."""
+
+    def __init__(self, config=None):
+        config = config or {}
+        self.store = TenderStore()
+        # Trwały indeks już widzianych przetargów, sprawdzany przed każdym zapisem
+        self.dedup_index = DedupIndex(retention_days=config.get("dedup_retention_days", DEFAULT_RETENTION_DAYS))
+
+        # Nowe przetargi trafiają do plików Excel partiami, w osobnym wątku
+        self.excel_writer = ExcelExportWriter(config.get("excel_flush_rows", DEFAULT_FLUSH_ROWS),
+                                              config.get("excel_flush_seconds", DEFAULT_FLUSH_SECONDS))
+        self.excel_writer.start()
+
+        if self.store.is_new:
+            self.import_excel_files()
+        if self.dedup_index.is_new:
+            self.seed_dedup_index()
+
+    def is_known(self, tender):
+        """Sprawdza w indeksie duplikatów, czy przetarg był już zapisany."""
+        return self.dedup_index.contains_key(tender.key, ALL)
+
+    def handle_new_tender(self, tender):
+        """Zwraca True, jeśli przetarg spełniający kryteria pojawił się po raz pierwszy."""
+        if not self.dedup_index.add_key(tender.key, FILTERED):
+            return False
+        if self.save_filtered_tender(tender):  # Zapisujemy do bazy przetargi spełniające kryteria
+            self.excel_writer.add(FILTERED_FILE, tender)
+        logger.info("Znaleziono przetarg: Tytuł: %s, Link: %s, Słowo kluczowe: %s", tender.title, tender.link,
+                    tender.keyword)
+        return True
+
+    def handle_all_results(self, tender):
+        """Metoda obsługująca wszystkie przetargi, niezależnie od słów kluczowych."""
+        if self.dedup_index.add_key(tender.key, ALL):
+            if self.save_all_tender(tender):
+                self.excel_writer.add(EXCEL_FILE, tender)
+            logger.debug("Zapisano przetarg bez filtrowania: Tytuł: %s, Link: %s", tender.title, tender.link)
+
+    def handle_unfiltered_tender(self, tender):
+        if self.dedup_index.add_key(tender.key, UNFILTERED):
+            if self.save_unfiltered_tender(tender):  # Zapisujemy przetargi niespełniające kryteriów
+                self.excel_writer.add(UNFILTERED_FILE, tender)
+            logger.debug("Zapisano przetarg niespełniający kryteriów: Tytuł: %s, Link: %s", tender.title, tender.link)
+
+    def save_unfiltered_tender(self, tender):
+        try:
+            if not self.store.set_match(tender):
+                logger.debug("Link już istnieje w bazie: %s", tender.link)
+                return False
+            logger.debug("Zapisano przetarg niespełniający kryteriów: %s", tender.title)
+            return True
+        except sqlite3.Error as e:
+            logger.error("Błąd podczas zapisu przetargu niespełniającego kryteriów: %s\nSzczegóły: %s", tender.title, e)
+            return False
+
+    def save_filtered_tender(self, tender):
+        try:
+            if not self.store.set_match(tender):
+                logger.debug("Link już istnieje w bazie: %s", tender.link)
+                return False
+            logger.debug("Zapisano przetarg do bazy filtrowanych przetargów: %s", tender.title)
+            return True
+        except sqlite3.Error as e:
+            logger.error("Błąd podczas zapisu przetargu do bazy filtrowanych: %s\nSzczegóły: %s", tender.title, e)
+            return False
+
+    def save_all_tender(self, tender):
+        try:
+            if not self.store.add(tender):
+                logger.debug("Link już istnieje w bazie: %s", tender.link)
+                return False
+            logger.debug("Zapisano przetarg do bazy wszystkich przetargów: %s", tender.title)
+            return True
+        except sqlite3.Error as e:
+            logger.error("Błąd podczas zapisu przetargu do bazy wszystkich przetargów: %s\nSzczegóły: %s", tender.title, e)
+            return False
+
+    def import_excel_files(self):
+        # Jednorazowa migracja istniejących plików Excel do nowej bazy
+        for file_path, matched in EXPORTS:
+            try:
+                imported = self.store.import_excel(file_path, matched)
+                if imported:
+                    logger.info("Zaimportowano %d przetargów z pliku: %s", imported, file_path)
+            except Exception as e:
+                logger.error("Błąd podczas importu pliku: %s\nSzczegóły: %s", file_path, e)
+
+    def seed_dedup_index(self):
+        # Nowy indeks wypełniamy przetargami zapisanymi już w bazie
+        rows = self.store.rows()
+        self.dedup_index.add_many((link for _, link, _ in rows), ALL)
+        self.dedup_index.add_many((link for _, link, _ in self.store.rows(MATCHED)), FILTERED)
+        self.dedup_index.add_many((link for _, link, _ in self.store.rows(UNMATCHED)), UNFILTERED)
+        logger.info("Utworzono indeks deduplikacji dla %d przetargów z bazy.", len(rows))
+
+    def export_to_excel(self, exports=EXPORTS):
+        # Pliki Excel są eksportem z bazy, a nie miejscem zapisu kolejnych przetargów; eksport (dziesiątki sekund
+        # przy dużej bazie) wykonuje wątek zapisu Excela, więc zapis kolejnych przetargów nie czeka
+        for file_path, matched in exports:
+            self.excel_writer.request_export(file_path, functools.partial(self.store.export_frame, matched))
+
+    def rematch(self, keywords, since=None):
+        """Klasyfikuje zapisane przetargi (od since, domyślnie wszystkie) według nowej listy słów kluczowych.
+
+        Zwraca liczbę przetargów, dla których zmieniły się dopasowane słowa.
+        """
+        started = time.monotonic()
+        matcher = KeywordMatcher(keywords)
+
+        def classify(titles):
+            # Cała partia tytułów jest dopasowywana jednym przejściem wyrażenia regularnego
+            return [", ".join(matched_keywords) if matched_keywords else None
+                    for matched_keywords in matcher.match_many(titles)]
+
+        newly_matched, newly_unmatched, changed = self.store.rematch(classify, since=since)
+        # Przetarg, który zmienił klasyfikację, nie powinien być później zgłaszany jako nowy
+        self.dedup_index.add_many(newly_matched, FILTERED)
+        self.dedup_index.add_many(newly_unmatched, UNFILTERED)
+        logger.info("Ponowne dopasowanie słów kluczowych: zmieniono %d przetargów (spełnia kryteria: +%d, "
+                    "przestało spełniać: %d) w %.1f s", changed, len(newly_matched), len(newly_unmatched),
+                    time.monotonic() - started)
+        if newly_matched or newly_unmatched:
+            # Pliki nie zawierają słów kluczowych, więc eksport jest potrzebny tylko po zmianie klasyfikacji;
+            # plik wszystkich przetargów się nie zmienia
+            self.export_to_excel(EXPORTS[1:])
+        return changed
+
+    def flush(self):
+        # Wywoływane na koniec cyklu wyszukiwania
+        self.excel_writer.request_flush()
+
+    def close(self, timeout=30):
+        # Zapisujemy oczekujące wiersze i eksporty przed zamknięciem programu
+        self.excel_writer.stop()
+        self.excel_writer.join(timeout)
+        self.store.close()
+        self.dedup_index.close()
+
+
+# Rodzaje zadań wątku zapisu
+SAVE_FILTERED = "filtered"
+SAVE_ALL = "all"
+SAVE_UNFILTERED = "unfiltered"
+FLUSH = "flush"
+EXPORT = "export"
+REMATCH = "rematch"
+STOP = "stop"
+SAVE_TASKS = (SAVE_FILTERED, SAVE_ALL, SAVE_UNFILTERED)
+
+
+class PipelineWriter(threading.Thread):
+    """Wątek zapisu przetargów: wątek wyszukiwania tylko dodaje je do kolejki i od razu wraca do pobierania."""
+
+    def __init__(self, pipeline, new_tender_callback=None, metrics=None):
+        super().__init__(daemon=True)
+        self.pipeline = pipeline
+        self.metrics = metrics  # MetricsRegistry, do którego dopisujemy czas zapisu przetargów z każdego cyklu
+        if metrics is not None:
+            metrics.track_persist()
+        self.persist = {}  # Strona -> czas zapisu przetargów od poprzedniego FLUSH
+        self.new_tender_callback = new_tender_callback  # Wywoływany dla przetargów spełniających kryteria po zapisie
+        self.queue = Queue()
+        self.rematch_lock = threading.Lock()
+        self.rematch_request = None  # (słowa kluczowe, callback) oczekującego ponownego dopasowania
+        # Przetargi z cyklu trwającego w chwili zmiany słów są dopasowane do starej listy, a zapisywane po
+        # ponownym dopasowaniu - na koniec cyklu (FLUSH) sprawdzamy jeszcze raz te zapisane od jego rozpoczęcia
+        self.recheck = None  # (słowa kluczowe, callback, czas rozpoczęcia ponownego dopasowania)
+
+    def handle_new_tender(self, tender):
+        self.queue.put((SAVE_FILTERED, tender))
+
+    def handle_all_results(self, tender):
+        self.queue.put((SAVE_ALL, tender))
+
+    def handle_unfiltered_tender(self, tender):
+        self.queue.put((SAVE_UNFILTERED, tender))
+
+    def flush(self):
+        # Zapis do Excela po przetworzeniu przetargów dodanych przed wywołaniem; wywoływane na koniec cyklu,
+        # więc czas zapisu przetargów sprzed FLUSH należy do cyklu, który właśnie się zakończył
+        cycle = self.metrics.last_cycle if self.metrics is not None else None
+        self.queue.put((FLUSH, cycle))
+
+    def export_to_excel(self):
+        # Pełny eksport z bazy po zapisaniu przetargów, które już czekają w kolejce
+        self.queue.put((EXPORT, None))
+
+    def rematch(self, keywords, callback=None):
+        """Zleca ponowne dopasowanie zapisanych przetargów do nowej listy słów kluczowych.
+
+        Zadanie trafia do tej samej kolejki co zapis, więc nie koliduje z zapisem nowych przetargów. Kilka zmian
+        słów zleconych przed rozpoczęciem zadania jest wykonywanych raz, z ostatnią listą. Callback dostaje
+        liczbę przetargów, które zmieniły klasyfikację.
+        """
+        with self.rematch_lock:
+            pending = self.rematch_request is not None
+            self.rematch_request = (list(keywords), callback)
+        if not pending:
+            self.queue.put((REMATCH, None))
+
+    def run_rematch(self):
+        with self.rematch_lock:
+            keywords, callback = self.rematch_request
+            self.rematch_request = None
+        started = time.time()
+        changed = self.pipeline.rematch(keywords)
+        self.recheck = (keywords, callback, started)
+        if callback is not None:
+            callback(changed)
+
+    def run_recheck(self):
+        keywords, callback, started = self.recheck
+        self.recheck = None
+        changed = self.pipeline.rematch(keywords, since=started)
+        if changed and callback is not None:
+            callback(changed)
+
+    def run(self):
+        while True:
+            task, item = self.queue.get()
+            if task == STOP:
+                self.queue.task_done()
+                return
+            started = time.perf_counter()
+            try:
+                if task == SAVE_FILTERED:
+                    if self.pipeline.handle_new_tender(item) and self.new_tender_callback is not None:
+                        self.new_tender_callback(item)
+                elif task == SAVE_ALL:
+                    self.pipeline.handle_all_results(item)
+                elif task == SAVE_UNFILTERED:
+                    self.pipeline.handle_unfiltered_tender(item)
+                elif task == FLUSH:
+                    if self.metrics is not None:
+                        self.metrics.record_persist(item, self.persist)
+                        self.persist = {}
+                    if self.recheck is not None:
+                        self.run_recheck()
+                    self.pipeline.flush()
+                elif task == EXPORT:
+                    self.pipeline.export_to_excel()
+                elif task == REMATCH:
+                    self.run_rematch()
+            except Exception as e:
+                logger.exception("Błąd podczas zadania wątku zapisu (%s): %s\nSzczegóły: %s", task, item, e)
+            if task in SAVE_TASKS:
+                self.persist[item.site] = self.persist.get(item.site, 0.0) + time.perf_counter() - started
+            self.queue.task_done()
+
+    def wait_idle(self):
+        """Czeka, aż wszystkie przetargi z kolejki zostaną zapisane (np. w benchmarkach)."""
+        self.queue.join()
+
+    def stop(self, timeout=30):
+        """Zapisuje przetargi oczekujące w kolejce i kończy wątek."""
+        self.queue.put((STOP, None))
+        self.join(timeout)
@@ -0,0 +1,50 @@
+import sys
+
+from dedup_index import dedup_key
+
+
+def intern_text(value):
+    # Te same napisy (strona, słowa kluczowe, region) powtarzają się w tysiącach przetargów
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+class Tender:
+    """Niezmienny przetarg przekazywany z wątku wyszukiwania do GUI i zapisu, bez słownika atrybutów."""
+
+    __slots__ = ("title", "link", "deadline", "buyer", "value", "region", "site", "keyword", "key")
+
+    def __init__(self, title, link, deadline=None, buyer=None, value=None, region=None, site=None, keyword=None,
+                 key=None):
+        init = object.__setattr__
+        init(self, "title", title)
+        init(self, "link", link)
+        init(self, "deadline", deadline)  # datetime.date lub None
+        init(self, "buyer", buyer)
+        init(self, "value", value)  # Kwota jako float lub None
+        init(self, "region", intern_text(region))
+        init(self, "site", intern_text(site))  # Adres strony z konfiguracji, na której znaleziono przetarg
+        init(self, "keyword", intern_text(keyword))  # Dopasowane słowa kluczowe lub None
+        # Klucz indeksu duplikatów liczony raz, a nie przy każdym sprawdzeniu i zapisie
+        init(self, "key", key if key is not None else (dedup_key(link) if link else None))
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Przetarg jest niezmienny")
+
+    def __delattr__(self, name):
+        raise AttributeError("Przetarg jest niezmienny")
+
+    def __reduce__(self):
+        return (Tender, (self.title, self.link, self.deadline, self.buyer, self.value, self.region, self.site,
+                         self.keyword, self.key))
+
+    def __repr__(self):
+        return f"Tender(title={self.title!r}, link={self.link!r}, keyword={self.keyword!r})"
+
+    def with_keyword(self, keyword):
+        """Kopia przetargu z wynikiem dopasowania słów kluczowych."""
+        return Tender(self.title, self.link, self.deadline, self.buyer, self.value, self.region, self.site, keyword,
+                      self.key)
+
+    def row(self):
+        """Wiersz w kolejności kolumn plików Excel."""
+        return (self.title, self.link, self.deadline, self.buyer, self.value, self.region)
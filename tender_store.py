@@ -0,0 +1,261 @@
+import os
+import re
+import sqlite3
+import threading
+import time
+
+from keyword_matcher import normalize_text
+
+STORE_FILE = os.path.join(os.getcwd(), "przetargi.db")  # Baza ze wszystkimi zebranymi przetargami
+
+# Klasyfikacja przetargu względem słów kluczowych
+MATCHED = 1
+UNMATCHED = 0
+
+# Pola szczegółowe przetargu (kolumna -> typ), dodawane także do baz utworzonych przed ich wprowadzeniem
+DETAIL_COLUMNS = (("deadline", "TEXT"), ("buyer", "TEXT"), ("value", "REAL"), ("region", "TEXT"), ("site", "TEXT"))
+EXPORT_COLUMNS = ['Tytuł', 'Link', 'Termin', 'Zamawiający', 'Wartość', 'Region']
+SORT_COLUMNS = ("id", "title", "link", "keyword", "deadline", "buyer", "value", "region", "first_seen")
+FTS_BATCH_SIZE = 10000  # Liczba przetargów dopisywanych do indeksu jednym zapytaniem przy jego budowie
+FTS_CONDITION = "id IN (SELECT rowid FROM tenders_fts WHERE tenders_fts MATCH ?)"
+REMATCH_BATCH_SIZE = 20000  # Liczba przetargów klasyfikowanych ponownie w jednej partii
+
+
+def fts_query(text):
+    """Zapytanie FTS5: każde słowo (bez polskich znaków) jako prefiks, wszystkie muszą wystąpić."""
+    words = re.findall(r"\w+", normalize_text(text))
+    return " ".join(f'"{word}"*' for word in words)
+
+
+def fts_row(tender_id, *texts):
+    return (tender_id,) + tuple(normalize_text(text) if text else None for text in texts)
+
+
+class TenderStore:
+    """Trwały magazyn przetargów w SQLite z unikalnym indeksem na linku."""
+
+    def __init__(self, path=STORE_FILE):
+        self.path = path
+        self.lock = threading.Lock()  # Połączenie jest współdzielone przez wątek wyszukiwania i GUI
+        self.is_new = not os.path.exists(path)
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.execute("""
+            CREATE TABLE IF NOT EXISTS tenders (
+                id INTEGER PRIMARY KEY,
+                link TEXT NOT NULL UNIQUE,
+                title TEXT NOT NULL,
+                keyword TEXT,
+                matched INTEGER,
+                first_seen REAL NOT NULL
+            )
+        """)
+        existing = {row[1] for row in self.connection.execute("PRAGMA table_info(tenders)")}
+        for column, column_type in DETAIL_COLUMNS:
+            if column not in existing:
+                self.connection.execute(f"ALTER TABLE tenders ADD COLUMN {column} {column_type}")
+        self.connection.execute("CREATE INDEX IF NOT EXISTS idx_tenders_matched ON tenders(matched)")
+        self.connection.execute("CREATE INDEX IF NOT EXISTS idx_tenders_deadline ON tenders(deadline)")
+        self.fts = self.create_fts_index()
+        self.connection.commit()
+
+    def create_fts_index(self):
+        # Indeks pełnotekstowy przechowuje tekst bez polskich znaków (normalize_text), bo tokenizer
+        # SQLite nie sprowadza np. 'ł' do 'l'; rowid w indeksie to id przetargu
+        exists = self.connection.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'tenders_fts'").fetchone()
+        if not exists:
+            try:
+                self.connection.execute(
+                    "CREATE VIRTUAL TABLE tenders_fts USING fts5(title, buyer, region, content='', "
+                    "tokenize='unicode61 remove_diacritics 2')")
+            except sqlite3.OperationalError:
+                # SQLite bez FTS5 - wyszukiwanie przez LIKE
+                return False
+        self.index_missing()
+        return True
+
+    def index_missing(self):
+        """Dopisuje do indeksu pełnotekstowego przetargi, których jeszcze w nim nie ma (np. po imporcie)."""
+        last_id = self.connection.execute("SELECT MAX(rowid) FROM tenders_fts").fetchone()[0] or 0
+        while True:
+            rows = self.connection.execute(
+                "SELECT id, title, buyer, region FROM tenders WHERE id > ? ORDER BY id LIMIT ?",
+                (last_id, FTS_BATCH_SIZE)).fetchall()
+            if not rows:
+                return
+            self.connection.executemany("INSERT INTO tenders_fts (rowid, title, buyer, region) VALUES (?, ?, ?, ?)",
+                                        [fts_row(*row) for row in rows])
+            last_id = rows[-1][0]
+
+    def insert(self, tender):
+        deadline = tender.deadline.isoformat() if tender.deadline else None
+        cursor = self.connection.execute(
+            "INSERT OR IGNORE INTO tenders (link, title, deadline, buyer, value, region, site, first_seen) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (tender.link, tender.title, deadline, tender.buyer, tender.value, tender.region, tender.site, time.time()))
+        if self.fts and cursor.rowcount > 0:
+            # Indeks pełnotekstowy rośnie razem z bazą, w tej samej transakcji
+            self.connection.execute("INSERT INTO tenders_fts (rowid, title, buyer, region) VALUES (?, ?, ?, ?)",
+                                    fts_row(cursor.lastrowid, tender.title, tender.buyer, tender.region))
+        return cursor
+
+    def add(self, tender):
+        """Dodaje przetarg; zwraca False, jeśli link był już zapisany."""
+        with self.lock:
+            cursor = self.insert(tender)
+            self.connection.commit()
+            return cursor.rowcount > 0
+
+    def set_match(self, tender):
+        """Zapisuje wynik dopasowania (tender.keyword); zwraca False, jeśli klasyfikacja się nie zmieniła."""
+        keyword = tender.keyword
+        matched = MATCHED if keyword else UNMATCHED
+        with self.lock:
+            self.insert(tender)
+            cursor = self.connection.execute(
+                "UPDATE tenders SET matched = ?, keyword = ? WHERE link = ? AND matched IS NOT ?",
+                (matched, keyword, tender.link, matched))
+            self.connection.commit()
+            return cursor.rowcount > 0
+
+    def rows(self, matched=None):
+        """Zwraca (tytuł, link, słowo kluczowe) w kolejności dodania."""
+        query = "SELECT title, link, keyword FROM tenders"
+        params = ()
+        if matched is not None:
+            query += " WHERE matched = ?"
+            params = (matched,)
+        query += " ORDER BY id"
+        with self.lock:
+            return self.connection.execute(query, params).fetchall()
+
+    def query(self, matched=None, text=None, order_by="id", descending=True, limit=500, offset=0,
+              date_from=None, date_to=None):
+        """Strona przetargów (tytuł, link, słowo kluczowe, termin, zamawiający) i liczba wszystkich pasujących.
+
+        Tekst szukamy w tytule, zamawiającym i regionie bez względu na polskie znaki, a każde słowo może być
+        początkiem wyrazu ('remont drog' znajdzie 'Remont drogi'); date_from i date_to ograniczają termin.
+        """
+        if order_by not in SORT_COLUMNS:
+            raise ValueError(f"Nieznana kolumna sortowania: {order_by}")
+        conditions = []
+        params = []
+        if matched is not None:
+            conditions.append("matched = ?")
+            params.append(matched)
+        if text and self.fts:
+            match = fts_query(text)
+            if match:
+                conditions.append(FTS_CONDITION)
+                params.append(match)
+        elif text:
+            conditions.append("(title LIKE ? ESCAPE '\\' OR buyer LIKE ? ESCAPE '\\')")
+            escaped = text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+            pattern = f"%{escaped}%"
+            params.extend((pattern, pattern))
+        if date_from:
+            conditions.append("deadline >= ?")
+            params.append(date_from.isoformat())
+        if date_to:
+            conditions.append("deadline <= ?")
+            params.append(date_to.isoformat())
+        where = " WHERE " + " AND ".join(conditions) if conditions else ""
+        direction = "DESC" if descending else "ASC"
+        # Przetargi bez wartości w sortowanej kolumnie zawsze na końcu; id nigdy nie jest puste, a sortowanie
+        # po samym id korzysta z klucza głównego
+        if order_by == "id":
+            order = f"id {direction}"
+        else:
+            order = f"{order_by} IS NULL, {order_by} {direction}, id {direction}"
+        count_query = f"SELECT COUNT(*) FROM tenders{where}"
+        if conditions == [FTS_CONDITION]:
+            # Samo wyszukiwanie tekstu - liczba wyników prosto z indeksu pełnotekstowego
+            count_query = "SELECT COUNT(*) FROM tenders_fts WHERE tenders_fts MATCH ?"
+        with self.lock:
+            total = self.connection.execute(count_query, params).fetchone()[0]
+            rows = self.connection.execute(
+                f"SELECT title, link, keyword, deadline, buyer FROM tenders{where} ORDER BY {order} LIMIT ? OFFSET ?",
+                params + [limit, offset]).fetchall()
+        return rows, total
+
+    def rematch(self, classify, batch_size=REMATCH_BATCH_SIZE, since=None):
+        """Klasyfikuje ponownie wszystkie przetargi funkcją classify(lista tytułów) -> lista słów kluczowych
+        (None, gdy tytuł niczego nie dopasował).
+
+        Przetargi czytamy i aktualizujemy partiami (executemany), więc baza nie jest blokowana na cały czas
+        pracy. since (czas jak w first_seen) ogranicza zmiany do przetargów zapisanych od tego momentu.
+        Zwraca (linki, które zaczęły spełniać kryteria, linki, które przestały, liczba zmian).
+        """
+        newly_matched = []
+        newly_unmatched = []
+        changed = 0
+        last_id = 0
+        while True:
+            with self.lock:
+                rows = self.connection.execute(
+                    "SELECT id, link, title, keyword, matched FROM tenders WHERE id > ? AND first_seen >= ? "
+                    "ORDER BY id LIMIT ?", (last_id, since or 0, batch_size)).fetchall()
+            if not rows:
+                return newly_matched, newly_unmatched, changed
+            updates = []
+            new_keywords = classify([title for _, _, title, _, _ in rows])
+            for (tender_id, link, _, keyword, matched), new_keyword in zip(rows, new_keywords):
+                new_matched = MATCHED if new_keyword else UNMATCHED
+                if new_matched == matched and new_keyword == keyword:
+                    continue
+                updates.append((new_matched, new_keyword, tender_id))
+                if new_matched != matched:
+                    (newly_matched if new_matched == MATCHED else newly_unmatched).append(link)
+            if updates:
+                with self.lock:
+                    self.connection.executemany("UPDATE tenders SET matched = ?, keyword = ? WHERE id = ?", updates)
+                    self.connection.commit()
+                changed += len(updates)
+            last_id = rows[-1][0]
+
+    def import_excel(self, file_path, matched=None):
+        """Wczytuje przetargi z istniejącego pliku Excel (migracja ze starego formatu)."""
+        import pandas as pd
+
+        if not os.path.exists(file_path):
+            return 0
+        df = pd.read_excel(file_path)
+        if 'Tytuł' not in df.columns or 'Link' not in df.columns:
+            return 0
+        now = time.time()
+        rows = [(str(link), str(title), matched, now) for title, link in zip(df['Tytuł'], df['Link'])
+                if isinstance(link, str) and link]
+        with self.lock:
+            before = self.connection.total_changes
+            self.connection.executemany(
+                "INSERT OR IGNORE INTO tenders (link, title, matched, first_seen) VALUES (?, ?, ?, ?)", rows)
+            inserted = self.connection.total_changes - before
+            if matched is not None:
+                self.connection.executemany(
+                    "UPDATE tenders SET matched = ? WHERE link = ?", [(matched, row[0]) for row in rows])
+            if self.fts:
+                self.index_missing()
+            self.connection.commit()
+            return inserted
+
+    def export_frame(self, matched=None):
+        """Zwraca przetargi z bazy jako DataFrame w formacie plików Excel (Tytuł, Link i pola szczegółowe)."""
+        import pandas as pd
+
+        query = "SELECT title, link, deadline, buyer, value, region FROM tenders"
+        params = ()
+        if matched is not None:
+            query += " WHERE matched = ?"
+            params = (matched,)
+        query += " ORDER BY id"
+        with self.lock:
+            rows = self.connection.execute(query, params).fetchall()
+        df = pd.DataFrame(rows, columns=EXPORT_COLUMNS)
+        df['Termin'] = pd.to_datetime(df['Termin'], errors='coerce').dt.date
+        return df
+
+    def close(self):
+        with self.lock:
+            self.connection.close()
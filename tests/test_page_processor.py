@@ -0,0 +1,71 @@
+import unittest
+from unittest import mock
+
+import page_processor
+from html_parsing import backend_available
+from page_processor import PageRules, process_page, stream_page
+
+PAGE_URL = "https://przetargi.example/lista"
+ROW = '<tr><td class="title"><a href="/przetarg/{0}">Remont drogi nr {0}</a></td></tr>'
+
+
+def listing(rows):
+    return ('<html><body><table id="lista">' + "".join(ROW.format(i) for i in range(rows))
+            + "</table></body></html>").encode("utf-8")
+
+
+def chunks(content, size=page_processor.STREAM_CHUNK_SIZE):
+    for start in range(0, len(content), size):
+        yield content[start:start + size]
+
+
+def summary(page):
+    return [(tender.title, tender.link, keyword) for tender, keyword in page.tenders]
+
+
+@unittest.skipUnless(backend_available("lxml"), "wymaga lxml")
+class StreamPageTest(unittest.TestCase):
+    fields = (("title", ".//td[@class='title']/a"),)
+
+    def rules(self, *selectors):
+        return PageRules("lxml", selectors, self.fields, 20, None)
+
+    def test_stops_reading_when_selectors_are_complete(self):
+        content = listing(5000)
+        page, size, _ = stream_page(chunks(content), PAGE_URL, PAGE_URL, self.rules("//table[@id='lista']//tr"),
+                                    ("remont",))
+        self.assertLess(size, len(content))
+        self.assertEqual(summary(page), summary(process_page(content, PAGE_URL, PAGE_URL,
+                                                             self.rules("//table[@id='lista']//tr"), ("remont",))))
+
+    def test_selector_below_limit_is_not_checked_after_every_chunk(self):
+        # Selektor bez dopasowań nie pozwala przerwać czytania; sprawdzeń ma być logarytmicznie wiele
+        content = listing(20000)
+        rules = self.rules("//table[@id='lista']//tr", "//div[@class='brak']")
+        with mock.patch.object(page_processor, "is_complete", wraps=page_processor.is_complete) as is_complete:
+            page, size, _ = stream_page(chunks(content), PAGE_URL, PAGE_URL, rules, ("remont",))
+        self.assertEqual(size, len(content))
+        chunk_count = -(-len(content) // page_processor.STREAM_CHUNK_SIZE)
+        self.assertGreater(chunk_count, 50)
+        self.assertLessEqual(is_complete.call_count, len(rules.selectors) * (chunk_count.bit_length() + 1))
+        self.assertEqual(summary(page), summary(process_page(content, PAGE_URL, PAGE_URL, rules, ("remont",))))
+
+    def test_first_chunk_ending_inside_multibyte_character(self):
+        # Bez deklaracji kodowania pierwszy fragment kończy się w połowie "ż" - to nadal UTF-8
+        content = listing(50).replace(b"Remont drogi", "Remont drogi żółć".encode("utf-8"))
+        split = content.index("ż".encode("utf-8")) + 1
+        page, _, _ = stream_page(chunks(content, split), PAGE_URL, PAGE_URL, self.rules("//table[@id='lista']//tr"),
+                                 ("remont",))
+        self.assertEqual(summary(page), summary(process_page(content, PAGE_URL, PAGE_URL,
+                                                             self.rules("//table[@id='lista']//tr"), ("remont",))))
+        self.assertEqual(page.tenders[0][0].title, "Remont drogi żółć nr 0")
+
+    def test_unknown_declared_encoding_is_ignored(self):
+        content = listing(3).replace(b"<html>", b'<html><head><meta charset="utf-8lol"></head>')
+        page, _, _ = stream_page(chunks(content), PAGE_URL, PAGE_URL, self.rules("//table[@id='lista']//tr"),
+                                 ("remont",))
+        self.assertEqual(len(page.tenders), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,39 @@
+import unittest
+
+import requests
+
+from politeness import HostThrottled, RateLimiter
+
+URL = "https://przetargi.example/lista"
+
+
+class FakeResponse:
+    def __init__(self, status_code, retry_after=None):
+        self.status_code = status_code
+        self.headers = {"Retry-After": retry_after} if retry_after is not None else {}
+
+
+class RateLimiterTest(unittest.TestCase):
+    def setUp(self):
+        self.limiter = RateLimiter(requests.Session(), requests_per_second=4, respect_robots=False)
+
+    def rate(self):
+        return self.limiter.stats()["przetargi.example"]["rate"]
+
+    def test_rate_recovers_after_throttling(self):
+        self.limiter.note_response(URL, FakeResponse(429))
+        self.limiter.note_response(URL, FakeResponse(503))
+        self.assertEqual(self.rate(), 1)
+        for _ in range(20):
+            self.limiter.note_response(URL, FakeResponse(200))
+        self.assertEqual(self.rate(), 4)
+
+    def test_host_blocked_past_max_delay_is_skipped(self):
+        self.limiter.note_response(URL, FakeResponse(503, "120"))
+        with self.assertRaises(HostThrottled):
+            self.limiter.reserve(URL, max_delay=60)
+        self.assertGreater(self.limiter.reserve(URL), 100)
+
+
+if __name__ == "__main__":
+    unittest.main()
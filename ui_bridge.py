@@ -0,0 +1,39 @@
+from collections import namedtuple
+from queue import Queue, Empty
+
+UI_REFRESH_MS = 100  # Co ile milisekund GUI odbiera zdarzenia z wątków roboczych
+MAX_EVENTS_PER_BATCH = 1000  # Limit zdarzeń obsługiwanych w jednym przebiegu, żeby okno nie przestało reagować
+
+# Zdarzenia przekazywane z wątków roboczych do GUI
+ProgressEvent = namedtuple("ProgressEvent", "value")
+TenderEvent = namedtuple("TenderEvent", "tender")
+RematchEvent = namedtuple("RematchEvent", "changed")
+
+
+class UiBridge:
+    """Kolejka zdarzeń do GUI: wątki robocze tylko dodają zdarzenia, a widżety Tk zmienia wyłącznie główny wątek."""
+
+    def __init__(self):
+        self.queue = Queue()
+
+    def progress(self, value):
+        self.queue.put(ProgressEvent(value))
+
+    def tender(self, tender):
+        self.queue.put(TenderEvent(tender))
+
+    def rematched(self, changed):
+        self.queue.put(RematchEvent(changed))
+
+    def drain(self, limit=MAX_EVENTS_PER_BATCH):
+        """Zwraca oczekujące zdarzenia (najwyżej limit) bez czekania na kolejne."""
+        events = []
+        try:
+            while len(events) < limit:
+                events.append(self.queue.get_nowait())
+        except Empty:
+            pass
+        return events
+
+    def pending(self):
+        return not self.queue.empty()